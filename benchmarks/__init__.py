@@ -0,0 +1 @@
+""" airspeed velocity (asv) benchmarks of the modefit fitters. See asv.conf.json """
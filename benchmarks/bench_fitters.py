@@ -0,0 +1,129 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Timing and peak memory of the fitters' entry points.
+
+Run with airspeed velocity from the repository root:
+   asv run          # or asv run --python=same --quick for a local check
+   asv compare v0.3.0 HEAD
+"""
+
+import warnings
+import numpy as np
+
+import modefit
+from . import mockdata
+
+NPOINTS = [100, 1000, 10000, 100000, 1000000]
+
+# ============================ #
+#                              #
+#   Simple Fits                #
+#                              #
+# ============================ #
+class _FitBenchmark( object ):
+    """ fit of the fitter returned by get_fitter() for each npoints """
+    params      = NPOINTS
+    param_names = ["npoints"]
+    timeout     = 600
+    FITKWARGS   = {}
+
+    def setup(self, npoints):
+        """ """
+        warnings.filterwarnings("ignore")
+        self.fitter = self.get_fitter(npoints)
+
+    def get_fitter(self, npoints):
+        """ """
+        raise NotImplementedError("get_fitter must be defined by the child classes")
+
+    def time_fit(self, npoints):
+        """ """
+        self.fitter.fit(**self.FITKWARGS)
+
+    def peakmem_fit(self, npoints):
+        """ """
+        self.fitter.fit(**self.FITKWARGS)
+
+class StepFit( _FitBenchmark ):
+    FITKWARGS = {"sigma_a_guess":0.1, "sigma_b_guess":0.1}
+    def get_fitter(self, npoints):
+        x, y, dy = mockdata.get_step_data(npoints)
+        return modefit.stepfit(x, y, dy, xcut=10)
+
+class BimodalFit( _FitBenchmark ):
+    def get_fitter(self, npoints):
+        return modefit.bimodal_fit(*mockdata.get_bimodal_data(npoints))
+
+class NormalFit( _FitBenchmark ):
+    def get_fitter(self, npoints):
+        return modefit.normal(*mockdata.get_normal_data(npoints))
+
+class TruncNormalFit( _FitBenchmark ):
+    def get_fitter(self, npoints):
+        data, errors, boundaries = mockdata.get_truncnormal_data(npoints)
+        return modefit.truncnormal(data, boundaries, errors=errors)
+
+class PolyFit( _FitBenchmark ):
+    def get_fitter(self, npoints):
+        return modefit.get_polyfit(*mockdata.get_poly_data(npoints), degree=3)
+
+class NormPolyFit( _FitBenchmark ):
+    def get_fitter(self, npoints):
+        return modefit.get_normpolyfit(*mockdata.get_normpoly_data(npoints),
+                                       degree=2, ngauss=1)
+
+# ============================ #
+#                              #
+#   K-Folding                  #
+#                              #
+# ============================ #
+class KFoldStepFit( object ):
+    """ k-folding of the StepFit (1000 points) """
+    params      = [10, 100, 1000]
+    param_names = ["nsamples"]
+    timeout     = 600
+    NPOINTS     = 1000
+
+    def setup(self, nsamples):
+        """ """
+        warnings.filterwarnings("ignore")
+        x, y, dy = mockdata.get_step_data(self.NPOINTS)
+        self.fitter = modefit.stepfit(x, y, dy, xcut=10)
+
+    def time_kfold(self, nsamples):
+        """ """
+        self.fitter.fit(kfold=5, nsamples=nsamples)
+
+    def peakmem_kfold(self, nsamples):
+        """ """
+        self.fitter.fit(kfold=5, nsamples=nsamples)
+
+# ============================ #
+#                              #
+#   MCMC                       #
+#                              #
+# ============================ #
+class MCMCStepFit( object ):
+    """ run_mcmc of the StepFit: 300 steps of 16 walkers """
+    params      = NPOINTS[:4]
+    param_names = ["npoints"]
+    timeout     = 600
+    NRUN        = 300
+
+    def setup(self, npoints):
+        """ """
+        warnings.filterwarnings("ignore")
+        x, y, dy = mockdata.get_step_data(npoints)
+        self.fitter = modefit.stepfit(x, y, dy, xcut=10)
+        self.fitter.fit(sigma_a_guess=0.1, sigma_b_guess=0.1)
+
+    def time_run_mcmc(self, npoints):
+        """ """
+        np.random.seed(mockdata.SEED)
+        self.fitter.run_mcmc(self.NRUN, verbose=False, rng=mockdata.SEED)
+
+    def peakmem_run_mcmc(self, npoints):
+        """ """
+        np.random.seed(mockdata.SEED)
+        self.fitter.run_mcmc(self.NRUN, verbose=False, rng=mockdata.SEED)
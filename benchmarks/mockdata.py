@@ -0,0 +1,87 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Seeded mock data for the benchmarks (modelled on the notebooks) """
+
+import numpy as np
+
+SEED = 12345
+
+def get_step_data(npoints, seed=SEED):
+    """ step in the mean of y at x=10 (see 'Fitting Step on Mock Data')
+
+    Returns
+    -------
+    x, y, dy (arrays of size npoints)
+    """
+    rng = np.random.default_rng(seed)
+    x  = rng.uniform(0, 20, npoints)
+    y  = np.where(x<10, -0.07, 0.07) + rng.normal(0, 0.11, npoints)
+    dy = np.where(x<10, 0.10, 0.11)
+    return x, y, dy
+
+def get_bimodal_data(npoints, seed=SEED):
+    """ mixture of two normal distributions
+    (see 'Binormal_distribution_unknown_proba')
+
+    Returns
+    -------
+    data, errors (arrays of size npoints)
+    """
+    rng = np.random.default_rng(seed)
+    na   = int(0.4*npoints)
+    data = np.concatenate([rng.normal(1, 2, na), rng.normal(3, 20, npoints-na)])
+    return data, np.abs(rng.normal(0, 0.1, npoints))
+
+def get_normal_data(npoints, seed=SEED):
+    """ normal distribution with intrinsic dispersion
+    (see 'NormalDistribution_withIntrinsic')
+
+    Returns
+    -------
+    data, errors (arrays of size npoints)
+    """
+    rng = np.random.default_rng(seed)
+    errors = rng.uniform(0, 2, npoints) + 0.2
+    return rng.normal(3, 0.5, npoints) + rng.normal(0, errors), errors
+
+def get_truncnormal_data(npoints, boundaries=[2.5, None], seed=SEED):
+    """ get_normal_data() restricted to the given boundaries
+    (about half of the points are kept for the default boundaries)
+
+    Returns
+    -------
+    data, errors, boundaries
+    """
+    data, errors = get_normal_data(2*npoints, seed=seed)
+    flagin = np.ones(len(data), dtype="bool")
+    if boundaries[0] is not None:
+        flagin &= data >= boundaries[0]
+    if boundaries[1] is not None:
+        flagin &= data <= boundaries[1]
+    return data[flagin][:npoints], errors[flagin][:npoints], boundaries
+
+def get_poly_data(npoints, seed=SEED):
+    """ second order polynome with errors (see 'Polynome_Fit')
+
+    Returns
+    -------
+    x, y, dy (arrays of size npoints)
+    """
+    rng = np.random.default_rng(seed)
+    x  = rng.uniform(-3, 8, npoints)
+    dy = np.full(npoints, 30.)
+    return x, x*3 + 2 + 4*x**2 + rng.normal(0, dy), dy
+
+def get_normpoly_data(npoints, seed=SEED):
+    """ gaussian line on top of a linear continuum
+
+    Returns
+    -------
+    x, y, dy (arrays of size npoints)
+    """
+    rng = np.random.default_rng(seed)
+    x  = np.linspace(0, 100, npoints)
+    dy = np.full(npoints, 0.5)
+    y  = 10 + 0.05*x + 20*np.exp(-0.5*((x-40)/3.)**2) + rng.normal(0, dy)
+    return x, y, dy
@@ -3,6 +3,7 @@
 
 """ Low level module to manage the scipy/minuit code variations """
 
+import time
 import warnings
 import numpy as np
 
@@ -19,7 +20,8 @@ except ImportError:
     raise ImportError("You need to install iminuit: pip install iminuit")
 
 
-from .utils     import make_method, is_arraylike
+from .utils     import is_arraylike, get_nworkers, parallel_map, get_percentiles, \
+     StreamingSummary, RunStats, run_phase
 
 
 ###################################
@@ -33,9 +35,11 @@ class MCMC( BaseObject ):
     
 
     PROPERTIES         = ["lnprob","freeparameters","runprop",
-                          "burnin","properties"]
-    SIDE_PROPERTIES    = ["boundaries_poswalkers"]
-    DERIVED_PROPERTIES = ["sampler","poswalkers", "chain"]
+                          "burnin","thin","properties","vectorize"]
+    SIDE_PROPERTIES    = ["boundaries_poswalkers","pool","n_jobs",
+                          "backend_file","backend_name","stats"]
+    DERIVED_PROPERTIES = ["sampler","poswalkers", "chain", "convergence", "backend",
+                          "samples_cache", "streaming", "niteration"]
     
     # MCMC global variables
     RUN_PROPERTIES = ["guess","guess_err","nrun","nwalkers"]
@@ -45,7 +49,7 @@ class MCMC( BaseObject ):
     # ========================= #
     def __init__(self, lnprob=None, freeparameters=None,
                  guess=None,guess_err=None, empty=False,
-                 boundaries_poswalkers=None):
+                 boundaries_poswalkers=None, vectorize=False):
         """ The mcmc object
 
         Parameters
@@ -65,6 +69,11 @@ class MCMC( BaseObject ):
             typical error range for the initial guess. The walkers will be
             initialized around 'guess' +/- 'guess_err'
 
+        vectorize: [bool] -optional-
+            Set this to True if lnprob accepts a (nwalkers, nparam) array
+            and returns the nwalkers log-probabilities at once.
+            emcee's vectorized mode is then used.
+
         Return
         ------
         Loads the instance.
@@ -73,16 +82,64 @@ class MCMC( BaseObject ):
             return
         
         self._properties["lnprob"] = lnprob
+        self._properties["vectorize"] = vectorize
         self._properties["freeparameters"] = freeparameters
         self._side_properties["boundaries_poswalkers"] = boundaries_poswalkers
         
     # ========================= #
     #   Main Methods            #
     # ========================= #
-    def run(self, verbose=True,**kwargs):
+    def run(self, verbose=True, pool=None, n_jobs=None,
+            converge=False, ntau=50, check_every=100, tau_rtol=0.01,
+            resume=False, streaming=False, burnin=None, nreservoir=10000,
+            seed=None, rng=None, **kwargs):
             
         """ run the mcmc. This method could take time
         (running method based on emcee)
+
+        converge: [bool] -optional-
+            If True, nrun is the maximum number of steps: the integrated
+            autocorrelation time tau is estimated every `check_every` steps and
+            the run stops once the chain is longer than `ntau` x tau and tau
+            changed by less than `tau_rtol` since the previous check.
+            The burnin and thin are then set from tau and the
+            diagnostics are stored in self.convergence. (emcee>=3 needed)
+
+        resume: [bool] -optional-
+            If a backend file is set (see set_backend) and already contains
+            steps, the walkers restart from their last stored positions and
+            only the missing steps (up to nrun) are run.
+            Otherwise the backend file is overwritten.
+
+        pool: [Pool] -optional-
+            pool (with a map method, like multiprocessing.Pool) used by emcee to
+            evaluate the walkers in parallel. lnprob must then be picklable.
+            If None, the pool set by set_pool() is used (if any).
+
+        n_jobs: [int] -optional-
+            if no pool is given, a multiprocessing.Pool with `n_jobs` workers
+            is created for the run (and closed afterwards). lnprob is then
+            sent once to each worker, only the walkers' positions are sent
+            at each step (a given pool receives lnprob at each step).
+
+        streaming: [bool] -optional-
+            Low memory mode: the chain is not stored. After `burnin` steps,
+            the walkers' positions of each step update streaming estimates of
+            the 16, 50, 84% quantiles and moments of the parameters, and
+            a uniform random subset of `nreservoir` draws is kept as `samples`
+            (see StreamingSummary and self.streaming).
+            derived_values/derived_parameters are then based on these estimates.
+            (emcee>=3 needed ; not compatible with converge or a backend)
+
+        burnin: [int] -optional-
+            burnin of the streaming mode (required if streaming).
+
+        nreservoir, seed: [int, int/None] -optional-
+            number of draws kept in the streaming mode and seed of their selection.
+
+        rng: [numpy.random.Generator/RandomState/int/None] -optional-
+            if given, the initial positions of the walkers are drawn
+            with this generator (see draw_poswalkers).
         
         **kwargs could be any `properties` entry:
            nrun, nwalkers, guess, guess_err
@@ -103,17 +160,202 @@ class MCMC( BaseObject ):
             raise AttributeError("At least one of the following proprety" +\
                                  " has not been setup: nrun, nwalkers, guess, guess_err")
         self.reset(reset_property=False)
-        
-        # -- run the mcmc        
-        self._derived_properties["sampler"] = emcee.EnsembleSampler(self.nwalkers, self.nparam, self.lnprob)
-        if verbose:
-            print("-> emcee EmsembleSampler defined")
+        if streaming:
+            if converge or self.backend_file is not None:
+                raise ValueError("streaming mode cannot be used with converge or a backend (these need the chain)")
+            if burnin is None or burnin < 0 or burnin >= self.nrun:
+                raise ValueError("streaming mode requires a burnin between 0 and nrun-1 (%s given)"%burnin)
+            
+        with run_phase(self.stats, "walkers"):
+            if rng is not None:
+                self._derived_properties["poswalkers"] = self.draw_poswalkers(rng=rng)
+            backend, initial_state, nsteps = self._setup_backend_(emcee, resume=resume)
+        
+        # -- parallelisation
+        if pool is None:
+            pool = self.pool
+        if n_jobs is None:
+            n_jobs = self._side_properties["n_jobs"]
+        close_pool = pool is None and get_nworkers(n_jobs) > 1
+        lnprob     = self.lnprob
+        if close_pool:
+            import multiprocessing
+            pool = multiprocessing.Pool(get_nworkers(n_jobs), initializer=_set_pool_lnprob_,
+                                        initargs=(self.lnprob,))
+            lnprob = _pool_lnprob_
+        
+        # -- run the mcmc
+        try:
+            self._derived_properties["sampler"] = self._get_sampler_(emcee, pool=pool,
+                                                                     backend=backend,
+                                                                     lnprob=lnprob)
+            if verbose:
+                print("-> emcee EmsembleSampler defined")
+                if nsteps < self.nrun:
+                    print("   resuming from step %d"%(self.nrun-nsteps))
+                    
+            with run_phase(self.stats, "sampling"):
+                if streaming:
+                    self._run_streaming_(initial_state, nsteps, burnin,
+                                         nreservoir=nreservoir, seed=seed)
+                elif converge:
+                    self._run_until_converged_(initial_state, nsteps, ntau=ntau,
+                                               check_every=check_every, tau_rtol=tau_rtol)
+                elif nsteps > 0:
+                    _ = self.sampler.run_mcmc(initial_state, nsteps)
+                    
+            if self.stats is not None:
+                self._count_lnprob_calls_(initial_state, nsteps, streaming=streaming)
+        finally:
+            if close_pool:
+                pool.close()
+                pool.join()
+                self.sampler.pool = None
+                
+        # -- the chain may be shorter (converge) or longer (resume) than nrun
+        if streaming or not hasattr(self.sampler, "iteration"):
+            self._derived_properties["niteration"] = self.nrun
+        else:
+            self._derived_properties["niteration"] = self.sampler.iteration
+        self._reset_samples_cache_()
             
-        _ = self.sampler.run_mcmc(self.poswalkers, self.nrun)
-        
         if verbose:
             print("-> MCMC sampler.run_mcmc() done")
+            if converge:
+                print("   %s after %d steps (burnin %d, thin %d)"%(
+                    "converged" if self.convergence["converged"] else "NOT converged",
+                    self.niteration, self.burnin, self.thin))
+
+    def _run_until_converged_(self, initial_state, nsteps,
+                              ntau=50, check_every=100, tau_rtol=0.01):
+        """ run the sampler for at most `nsteps` steps, stopping once the
+        autocorrelation time is stable and short compared to the chain length.
+        (see run) """
+        if not hasattr(self.sampler, "get_autocorr_time") or \
+          not hasattr(self.sampler, "iteration"):
+            raise ImportError("Convergence mode requires emcee>=3 => pip install -U emcee")
+        
+        iterations, taus = [], []
+        converged, old_tau = False, np.inf
+        for _ in self.sampler.sample(initial_state, iterations=max(nsteps, 0)):
+            iteration = self.sampler.iteration
+            if iteration % check_every:
+                continue
+            
+            tau = self.sampler.get_autocorr_time(tol=0)
+            iterations.append(iteration)
+            taus.append(tau)
+            converged = np.all(np.isfinite(tau)) and np.all(ntau * tau < iteration) and \
+                        np.all(np.abs(old_tau - tau) < tau_rtol * tau)
+            old_tau = tau
+            if converged:
+                break
+        
+        # -- the chain may be shorter than requested (nrun is kept as the maximum)
+        self._derived_properties["niteration"] = self.sampler.iteration
+        if len(taus) == 0 or not np.all(np.isfinite(taus[-1])):
+            tau = np.full(self.nparam, np.nan)
+        else:
+            tau = taus[-1]
             
+        self._derived_properties["convergence"] = {
+            "converged": converged, "niteration": self.niteration,
+            "ntau": ntau, "tau_rtol": tau_rtol,
+            "iterations": np.asarray(iterations, dtype="int"),
+            "tau_history": np.asarray(taus, dtype="float").reshape(-1, self.nparam),
+            "tau": tau}
+        
+        if np.all(np.isfinite(tau)):
+            self.set_burnin(min(int(np.ceil(2 * np.max(tau))), self.niteration - 1))
+            self.set_thin(max(1, int(0.5 * np.min(tau))))
+            
+    def _run_streaming_(self, initial_state, nsteps, burnin, nreservoir=10000, seed=None):
+        """ run the sampler without storing the chain, the positions of the
+        walkers after `burnin` steps update a StreamingSummary (see run) """
+        if not hasattr(self.sampler, "iteration"):
+            raise ImportError("Streaming mode requires emcee>=3 => pip install -U emcee")
+        
+        summary = StreamingSummary(self.nparam, quantiles=[16, 50, 84],
+                                   nreservoir=nreservoir, seed=seed)
+        for i, state in enumerate(self.sampler.sample(initial_state, iterations=nsteps,
+                                                      store=False)):
+            if i >= burnin:
+                summary.update(state.coords)
+                
+        self._properties["burnin"] = burnin
+        self._derived_properties["streaming"] = summary
+            
+    def _count_lnprob_calls_(self, initial_state, nsteps, streaming=False):
+        """ add the number of walker positions evaluated by the last run
+        to the stats' lnprob calls (counted from the steps made rather than
+        by wrapping lnprob, which could be evaluated in a pool) """
+        if streaming or not hasattr(self.sampler, "iteration"):
+            nsteps_done = nsteps
+        else:
+            nsteps_done = self.sampler.iteration - (self.nrun - nsteps)
+        # - the initial positions are evaluated unless coming from a backend
+        ninitial = 0 if getattr(initial_state, "log_prob", None) is not None else 1
+        self.stats.add_calls("lnprob", self.nwalkers * (max(nsteps_done, 0) + ninitial))
+
+    def _get_sampler_(self, emcee, pool=None, backend=None, lnprob=None):
+        """ the emcee EnsembleSampler, vectorized if possible.
+        If a pool is given, the walkers are distributed over the pool
+        (then not vectorized) using lnprob (default self.lnprob) """
+        kwargs = {} if backend is None else {"backend":backend}
+        if pool is not None:
+            return emcee.EnsembleSampler(self.nwalkers, self.nparam,
+                                         self.lnprob if lnprob is None else lnprob,
+                                         pool=pool, **kwargs)
+        
+        if self.vectorize:
+            try:
+                return emcee.EnsembleSampler(self.nwalkers, self.nparam, self.lnprob,
+                                             vectorize=True, **kwargs)
+            except TypeError:
+                warnings.warn("This emcee version has no vectorize mode (emcee>=3 needed). Walkers evaluated one by one.")
+                
+        return emcee.EnsembleSampler(self.nwalkers, self.nparam, self.lnprob, **kwargs)
+
+    def _setup_backend_(self, emcee, resume=False):
+        """ the emcee backend storing the chain on disk (None if no backend_file),
+        the initial state of the walkers and the number of steps to run.
+        (see set_backend) """
+        self._derived_properties["chain"] = None
+        if self.backend_file is None:
+            self._derived_properties["backend"] = None
+            return None, self.poswalkers, self.nrun
+        
+        backend = self._load_backend_(emcee, self.backend_file, self.backend_name)
+        self._derived_properties["backend"] = backend
+        if resume and self._backend_iteration_ > 0:
+            if backend.shape != (self.nwalkers, self.nparam):
+                raise ValueError("Cannot resume: the backend file shape %s does not match (nwalkers, nparam)=%s"%(
+                    backend.shape, (self.nwalkers, self.nparam)))
+            return backend, backend.get_last_sample(), self.nrun - self._backend_iteration_
+        
+        backend.reset(self.nwalkers, self.nparam)
+        with backend.open("a") as f:
+            f[backend.name].attrs["freeparameters"] = list(self.freeparameters)
+        return backend, self.poswalkers, self.nrun
+
+    @staticmethod
+    def _load_backend_(emcee, filename, name="mcmc", read_only=False):
+        """ emcee's HDFBackend (requires emcee>=3 and h5py) """
+        if not hasattr(emcee, "backends"):
+            raise ImportError("file-backed chains requires emcee>=3 => pip install -U emcee")
+        try:
+            return emcee.backends.HDFBackend(filename, name=name, read_only=read_only)
+        except ImportError:
+            raise ImportError("file-backed chains requires h5py => pip install h5py")
+
+    def _read_backend_chain_(self, start=0, step=1):
+        """ the chain stored in the backend file ([nwalkers, nrun, nparam]).
+        Only the steps start::step are read from the disk. """
+        with self.backend.open() as f:
+            g = f[self.backend.name]
+            chain = g["chain"][start:g.attrs["iteration"]:step]
+        return np.swapaxes(chain, 0, 1)
+        
     # ------------ #
     # - SETTER   - #
     # ------------ #
@@ -136,24 +378,107 @@ class MCMC( BaseObject ):
         if reset:
             self.reset(reset_property=False)
         
+    def set_pool(self, pool=None, n_jobs=None):
+        """ defines how the walkers are evaluated in parallel during run().
+
+        Parameters
+        ----------
+        pool: [Pool/None]
+            pool with a map method (e.g. multiprocessing.Pool) given to emcee.
+
+        n_jobs: [int/None]
+            if pool is None, a multiprocessing.Pool with n_jobs workers
+            will be created at each run.
+        """
+        self._side_properties["pool"]   = pool
+        self._side_properties["n_jobs"] = n_jobs
+
+    def set_backend(self, filename, name="mcmc"):
+        """ store the chain in a HDF5 file while running.
+        (emcee's HDFBackend, requires h5py)
+
+        The file is filled at each step, so a interrupted run could be
+        resumed (see run(resume=True)) and the chain does not have to fit in memory.
+
+        Parameters
+        ----------
+        filename: [string/None]
+            path of the HDF5 file. None to keep the chain in memory.
+
+        name: [string] -optional-
+            name of the group of the HDF5 file containing the chain.
+        """
+        self._side_properties["backend_file"] = filename
+        self._side_properties["backend_name"] = name
+
+    def set_stats(self, stats=True, callback=None):
+        """ record the wall time of the run phases (walkers: initial positions,
+        sampling) and the number of walker positions evaluated (lnprob).
+        Nothing is recorded by default.
+
+        Parameters
+        ----------
+        stats: [bool/RunStats/None]
+            True to record in a new RunStats, a RunStats to record in it
+            (e.g. that of the fitter), None or False to stop recording.
+
+        callback: [function/None] -optional-
+            called as callback(name, elapsed, stats) at the end of each phase
+            (see RunStats). Ignored if a RunStats is given.
+
+        Returns
+        -------
+        RunStats (or None), also accessible as self.stats
+        """
+        if stats is True:
+            stats = RunStats(callback=callback)
+        elif stats is False:
+            stats = None
+        elif stats is not None and not isinstance(stats, RunStats):
+            raise TypeError("stats must be a bool, None or a RunStats (%s given)"%type(stats))
+        
+        self._side_properties["stats"] = stats
+        return stats
+        
     def set_burnin(self, value):
         """ defines the burnin value above which the walkers
         are consistants. This is required to access the `samples`
         """
         
-        if value<0 or value>self.nrun:
+        if value<0 or value>self.niteration:
             raise ValueError("the mcmc burnin must be greater than 0 and lower"+\
                              " than the amount of run.")
+        if self.streaming is not None:
+            raise ValueError("The burnin of a streaming run cannot be changed (no chain stored)")
         self._properties["burnin"] = value
+        self._reset_samples_cache_()
 
+    def set_thin(self, value):
+        """ defines the thinning of the chain: only one every `value`
+        steps (after the burnin) is used in the `samples` """
+        if value is not None and int(value) < 1:
+            raise ValueError("the mcmc thin must be a strictly positive integer")
+        self._properties["thin"] = None if value is None else int(value)
+        self._reset_samples_cache_()
+        
     def reset(self, reset_property=True):
         """ clean the derived values """
         if reset_property:
             self._properties["properties"]     = None
             
         self._properties["burnin"]             = None
+        self._properties["thin"]               = None
         self._derived_properties["poswalkers"] = None
         self._derived_properties["sampler"]    = None
+        self._derived_properties["convergence"] = None
+        self._derived_properties["streaming"]   = None
+        self._derived_properties["niteration"]  = None
+        self._reset_samples_cache_()
+
+    def _reset_samples_cache_(self):
+        """ the samples and their statistics will be computed again
+        at the next call (see samples) """
+        self._derived_properties["samples_cache"] = None
 
     # ------------ #
     # - I/O      - #
@@ -166,6 +491,8 @@ class MCMC( BaseObject ):
         mcmcdata: [dict]
             Dictionary as create by the MCMC class' method 'data', containing the keys:
             "chain", "freeparameters", "burnin", "poswalkers"
+            (and optionally "thin"). "chain" could be None if the
+            "backend" entry [filename, name] is given.
         """
         # --------------
         # - Input Test
@@ -177,26 +504,37 @@ class MCMC( BaseObject ):
         # --------------
         # - Setting
         self._properties["freeparameters"] = mcmcdata["freeparameters"]
-        self.set_chain(mcmcdata["chain"])
+        if mcmcdata["chain"] is None and mcmcdata.get("backend", None) is not None:
+            self.set_chain(*mcmcdata["backend"])
+        else:
+            self.set_chain(mcmcdata["chain"])
         self.set_burnin(mcmcdata["burnin"])
+        self.set_thin(mcmcdata.get("thin", None))
         self.properties["guess"] = mcmcdata["guess"]
         
-    def set_chain(self, chain):
+    def set_chain(self, chain, name="mcmc"):
         """ set the mcmc chain, so you do not need to run_mcmc
 
         Parameters
         ----------
-        chain: [3D N-length array]
+        chain: [3D N-length array / string]
             chain containing the walkers information. It's shape is the following:
             [nwalkers, nrun, n-freeparameters], where
                - nwalkers is the number of walkers
                - nrun is the number of mcmc run
                - n-freeparameters is the number of free parameters of the model
+            This could also be the HDF5 file created by a run with a backend
+            (see set_backend). The chain is then read from the file when needed.
+
+        name: [string] -optional-
+            name of the HDF5 file group containing the chain (if chain is a file)
                
         Return
         ------
         Void
         """
+        if type(chain) is str:
+            return self._set_chain_from_file_(chain, name)
         # --------------
         # - Input
         try:
@@ -215,7 +553,37 @@ class MCMC( BaseObject ):
         # - Input
         self.nwalkers = nwalkers
         self.properties["nrun"] = nruns
+        self._derived_properties['niteration'] = None
         self._derived_properties['chain'] = chain
+        self._derived_properties['backend'] = None
+        self._derived_properties['streaming'] = None
+        self._reset_samples_cache_()
+
+    def _set_chain_from_file_(self, filename, name="mcmc"):
+        """ lazy set_chain from a HDF5 backend file """
+        try:
+            import emcee
+        except ImportError:
+            raise ImportError("Install emcee first => sudo pip install emcee")
+        
+        backend = self._load_backend_(emcee, filename, name, read_only=True)
+        with backend.open() as f:
+            attrs = f[name].attrs
+            nwalkers, nparam, nruns = attrs["nwalkers"], attrs["ndim"], attrs["iteration"]
+            if self.freeparameters is None and "freeparameters" in attrs:
+                self._properties["freeparameters"] = [str(p) for p in attrs["freeparameters"]]
+                
+        if self.freeparameters is None or nparam != self.nparam:
+            raise TypeError("The chain do not have the good number of freeparameter")
+        
+        self.nwalkers = nwalkers
+        self.properties["nrun"] = int(nruns)
+        self._derived_properties['niteration'] = None
+        self._derived_properties['chain'] = None
+        self._derived_properties['sampler'] = None
+        self._derived_properties['backend'] = backend
+        self._derived_properties['streaming'] = None
+        self._reset_samples_cache_()
         
     # ========================= #
     #   Plot Methods            #
@@ -258,7 +626,7 @@ class MCMC( BaseObject ):
         for i, name, fitted in zip(range(self.nparam), self.freeparameters,
                                    self.guess if truths is None else truths):
             ax = fig.add_subplot(self.nparam,1,i+1, ylabel=name)
-            _ = ax.plot(np.arange(self.nrun), self.chain.T[i],
+            _ = ax.plot(np.arange(self.niteration), self.chain.T[i],
                         color=cwalker,**kwargs)
             
             ax.axhline(fitted, color=cline, lw=2)
@@ -314,10 +682,21 @@ class MCMC( BaseObject ):
     
     @property
     def data(self):
-        """ dictionary containing the basic mcmc information """
+        """ dictionary containing the basic mcmc information
+        (if the chain is stored in a file, "chain" is None and
+        "backend" gives [filename, name]) """
+        if self.backend is not None:
+            return {"chain":         None,
+                    "backend":       [self.backend.filename, self.backend.name],
+                    "freeparameters":self.freeparameters,
+                    "burnin":        self.burnin,
+                    "thin":          self._properties["thin"],
+                    "guess":         self.guess}
+        
         return {"chain":         self.chain,
                 "freeparameters":self.freeparameters,
                 "burnin":        self.burnin,
+                "thin":          self._properties["thin"],
                 "guess":         self.guess}
     
     #  MCMC base
@@ -355,6 +734,27 @@ class MCMC( BaseObject ):
         Bayesian framework."""
         return self._properties["lnprob"]
 
+    @property
+    def vectorize(self):
+        """ does lnprob accept a (nwalkers, nparam) array """
+        return self._properties["vectorize"] is True
+
+    @property
+    def pool(self):
+        """ pool used to evaluate the walkers in parallel (see set_pool) """
+        return self._side_properties["pool"]
+
+    @property
+    def backend_file(self):
+        """ HDF5 file where the chain is stored while running (see set_backend) """
+        return self._side_properties["backend_file"]
+
+    @property
+    def backend_name(self):
+        """ group of the backend_file containing the chain """
+        return self._side_properties["backend_name"] \
+          if self._side_properties["backend_name"] is not None else "mcmc"
+
     #   MCMC properties
     # --------------------
     @property
@@ -362,6 +762,14 @@ class MCMC( BaseObject ):
         """ number of run for the mcmc"""
         return self.properties["nrun"]
     
+    @property
+    def niteration(self):
+        """ number of steps of the chain. This could differ from nrun if the
+        last run stopped once converged or resumed a longer backend file """
+        if self._derived_properties["niteration"] is None:
+            return self.nrun
+        return self._derived_properties["niteration"]
+    
     @property
     def nwalkers(self):
         """ number of walkers used to scan the parameter space
@@ -384,19 +792,75 @@ class MCMC( BaseObject ):
             
         return self._derived_properties["poswalkers"]
 
-    def draw_poswalkers(self):
-        """ return a generation of initial position for the walker.
-        If an initial guess hit the boundaries, it will be redrawn """
-        if self._boundaries_poswalkers is None:
-            return [np.random.uniform(self.guess-self.guess_err,
-                                    self.guess+self.guess_err,size=self.nparam)
-                    for i in range(self.nwalkers)]
-
-        bounds = np.asarray(self._boundaries_poswalkers, dtype="float")
-        return [np.random.uniform(np.nanmax([self.guess-self.guess_err,bounds.T[0]],axis=0),
-                                  np.nanmin([self.guess+self.guess_err,bounds.T[1]],axis=0),
-                                  size=self.nparam)
-                for i in range(self.nwalkers)]
+    def draw_poswalkers(self, rng=None, maxiter=100):
+        """ return a generation of initial position for the walker:
+        uniformly drawn within guess +/- guess_err (restricted to the
+        boundaries_poswalkers, if any).
+        The walkers for which lnprob is not finite (e.g. out of the prior)
+        are redrawn (at most maxiter times).
+
+        Parameters
+        ----------
+        rng: [numpy.random.Generator/RandomState/int/None] -optional-
+            random number generator (or its seed) used for the draws.
+            If None, numpy's global random state is used (see np.random.seed).
+
+        maxiter: [int] -optional-
+            maximum number of redraws of the invalid walkers.
+
+        Returns
+        -------
+        (nwalkers, nparam) array
+        """
+        # - numpy's global random functions by default (see np.random.seed)
+        if rng is None:
+            uniform = np.random.uniform
+        elif isinstance(rng, np.random.RandomState):
+            uniform = rng.uniform
+        else:
+            uniform = np.random.default_rng(rng).uniform
+        guess, guess_err = np.asarray(self.guess, dtype="float"), np.asarray(self.guess_err, dtype="float")
+        # - undefined errors (e.g. fit stuck on a boundary): small spread
+        #   around the guess so that the walkers are not degenerated
+        undefined = ~np.isfinite(guess_err)
+        if np.any(undefined):
+            warnings.warn("undefined guess_err for %s, a relative spread of 1e-3 is used instead"%
+                          ", ".join(np.asarray(self.freeparameters if self.freeparameters is not None
+                                               else np.arange(self.nparam), dtype="str")[undefined]))
+            guess_err = np.where(undefined, 1e-3*np.fmax(np.abs(guess), 1), guess_err)
+            
+        low, high = guess-guess_err, guess+guess_err
+        if self._boundaries_poswalkers is not None:
+            bounds = np.asarray(self._boundaries_poswalkers, dtype="float")
+            low, high = np.fmax(low, bounds.T[0]), np.fmin(high, bounds.T[1])
+            
+        poswalkers = uniform(low, high, size=(self.nwalkers, self.nparam))
+        valid = self._is_valid_position_(poswalkers)
+        for i in range(maxiter):
+            if np.all(valid):
+                break
+            invalid = np.flatnonzero(~valid)
+            poswalkers[invalid] = uniform(low, high, size=(len(invalid), self.nparam))
+            valid[invalid] = self._is_valid_position_(poswalkers[invalid])
+        else:
+            if not np.all(valid):
+                warnings.warn("%d walkers start where lnprob is not finite"%np.sum(~valid))
+            
+        return poswalkers
+
+    def _is_valid_position_(self, positions):
+        """ is lnprob finite for the given (n, nparam) positions
+        (evaluated at once if vectorize) """
+        if self.vectorize:
+            lnprob = np.asarray(self.lnprob(positions), dtype="float")
+        else:
+            lnprob = np.asarray([self.lnprob(p) for p in positions], dtype="float")
+        return np.isfinite(lnprob)
+    
+    @property
+    def stats(self):
+        """ RunStats recording the calls and timings of the runs (see set_stats) """
+        return self._side_properties["stats"]
     
     @property
     def _boundaries_poswalkers(self):
@@ -418,6 +882,11 @@ class MCMC( BaseObject ):
     def burnin(self):
         """ Number of walk below which the walker did not converged. """
         return self._properties["burnin"]
+
+    @property
+    def thin(self):
+        """ one step every `thin` is used in the samples (1 by default) """
+        return self._properties["thin"] if self._properties["thin"] is not None else 1
     
     #  Derived Properties
     # --------------------
@@ -426,27 +895,79 @@ class MCMC( BaseObject ):
         """ the emcee mcmc sampler """
         return self._derived_properties["sampler"]
 
+    @property
+    def convergence(self):
+        """ autocorrelation diagnostics of a run(converge=True):
+        converged, niteration, iterations, tau_history, tau... """
+        return self._derived_properties["convergence"]
+    
+    @property
+    def backend(self):
+        """ emcee's backend storing the chain on disk (if any) """
+        return self._derived_properties["backend"]
+
+    @property
+    def _backend_iteration_(self):
+        """ number of steps stored in the backend """
+        if not self.backend.initialized:
+            return 0
+        return self.backend.iteration
+    
+    @property
+    def streaming(self):
+        """ StreamingSummary of a streaming run (None otherwise, see run) """
+        return self._derived_properties["streaming"]
+    
     @property
     def chain(self):
-        """ the sampler chain of the walkers """
+        """ the sampler chain of the walkers (None for a streaming run) """
+        if self.streaming is not None:
+            return None
         if self._derived_properties['chain'] is None:
+            if self.backend is not None:
+                return self._read_backend_chain_()
             return self.sampler.chain if self.sampler is not None else None
         
         return self._derived_properties['chain']
         
     def has_chain(self):
         """ return True if you ran 'run_mcmc' """
+        if self.streaming is not None:
+            return True
+        if self._derived_properties['chain'] is None and self.backend is not None:
+            return True
         return self.chain is not None
 
+    @property
+    def _samples_cache(self):
+        """ samples and statistics computed once for the current chain,
+        burnin and thin (see _reset_samples_cache_) """
+        if self._derived_properties["samples_cache"] is None:
+            self._derived_properties["samples_cache"] = {}
+        return self._derived_properties["samples_cache"]
+    
     @property
     def samples(self):
-        """ the flatten samplers after burned in removal, see set_mcmc_samples """
+        """ the flatten samplers after burned in removal, see set_mcmc_samples
+        (computed once, read-only).
+        For a streaming run, this is the random subset of the draws kept. """
         if not self.has_chain():
             raise AttributeError("run mcmc first.")
         if self.burnin is None:
             raise AttributeError("You did not specified the burnin value. see 'set_burnin")
         
-        return self.chain[:, self.burnin:, :].reshape((-1, self.nparam))
+        if "samples" not in self._samples_cache:
+            if self.streaming is not None:
+                chain = self.streaming.samples.copy()
+            elif self._derived_properties['chain'] is None and self.backend is not None:
+                chain = self._read_backend_chain_(self.burnin, self.thin)
+            else:
+                chain = self.chain[:, self.burnin::self.thin, :]
+            samples = chain.reshape((-1, self.nparam))
+            samples.flags.writeable = False
+            self._samples_cache["samples"] = samples
+            
+        return self._samples_cache["samples"]
 
     @property
     def nsamples(self):
@@ -455,10 +976,18 @@ class MCMC( BaseObject ):
 
     @property
     def derived_values(self):
-        """ 3 times N array of the derived parameters
+        """ list (one entry per parameter) of the derived parameters
             [50%, +1sigma (to 84%), -1sigma (to 16%)]
+        (streaming estimates for a streaming run)
         """
-        return map(lambda v: (v[1], v[2]-v[1], v[1]-v[0]), zip(*np.percentile(self.samples, [16, 50, 84],axis=0)))
+        if "derived_values" not in self._samples_cache:
+            if self.streaming is not None:
+                p16, p50, p84 = self.streaming.get_quantiles()
+            else:
+                p16, p50, p84 = get_percentiles(self.samples, [16, 50, 84], axis=0)
+            self._samples_cache["derived_values"] = [(v50, v84-v50, v50-v16)
+                                                     for v16, v50, v84 in zip(p16, p50, p84)]
+        return list(self._samples_cache["derived_values"])
     
     @property
     def derived_parameters(self):
@@ -466,14 +995,26 @@ class MCMC( BaseObject ):
            NAME_OF_THE_PARAMETER = 50% pdf
            NAME_OF_THE_PARAMETER.err = [+1sigma, -1sigma]
         """
-        values = self.derived_values
         fitout = {}
-        for v,name in zip(values, self.freeparameters):
+        for v,name in zip(self.derived_values, self.freeparameters):
             fitout[name] = v[0]
             fitout[name+".err"] = [v[1],v[2]]
             
         return fitout
 
+# - lnprob of the pool workers created by MCMC.run: set once per worker
+#   (pool initializer) so that only the walkers' positions are sent at each step
+_POOL_LNPROB_ = None
+
+def _set_pool_lnprob_(lnprob):
+    """ pool initializer storing the lnprob (see MCMC.run) """
+    global _POOL_LNPROB_
+    _POOL_LNPROB_ = lnprob
+
+def _pool_lnprob_(parameters):
+    """ lnprob of the pool worker (see _set_pool_lnprob_) """
+    return _POOL_LNPROB_(parameters)
+
 ###################################
 #                                 #
 #   Data Management Classes       #
@@ -490,8 +1031,11 @@ class _KFolder_( BaseObject ):
     This Virtual class enables to deal with K-folding tools
     """
     PROPERTIES         = []
-    SIDE_PROPERTIES    = ["used_indexes"]
-    DERIVED_PROPERTIES = ["fold_indexes","kfold"]
+    SIDE_PROPERTIES    = ["used_indexes","weights"]
+    DERIVED_PROPERTIES = ["fold_indexes","kfold","used_data","bootvalues"]
+
+    # Shall the used-data arrays (see _get_used_data_) be read-only
+    USED_DATA_READONLY = True
 
     # ==================== #
     #    Main Method       #
@@ -522,16 +1066,94 @@ class _KFolder_( BaseObject ):
             self._derived_properties["fold_indexes"].append(indexes[noutfold:].copy())
             
 
-    def run_kfolding(self, kfold, nsamples=1000, **kwargs):
+    def run_kfolding(self, kfold, nsamples=1000, n_jobs=None, executor=None, **kwargs):
         """ Set the kfold property that contains a copy of the current instance
         with a kfolded fit() applied.
+
+        n_jobs, executor: [int/None, Executor/None] -optional-
+            distribute the fold fits over worker processes (see fit())
         
         **kwargs goes to fit()
+        The calls and timings of the folds are added to self.stats (if any, see set_stats)
         """
         folded = self.copy()
-        folded.fit(kfold=kfold, nsamples=nsamples, **kwargs)
+        folded.set_stats(None if self.stats is None else RunStats())
+        folded.fit(kfold=kfold, nsamples=nsamples, n_jobs=n_jobs, executor=executor,
+                   **kwargs)
+        if self.stats is not None:
+            self.stats.merge(folded.stats)
         self._derived_properties["kfold"] = folded
 
+    # --------------- #
+    #  bootstrap    - #
+    # --------------- #
+    def bootstrap(self, nboot=1000, n_jobs=None, executor=None, seed=None, **kwargs):
+        """ Fit `nboot` bootstrap replicates of the data.
+
+        Each replicate is a vector of counts (how many times each point is
+        drawn with replacement) used as weights of the log-likelihood, so no
+        data is copied. The replicates are made on light copies of the instance.
+
+        Parameters
+        ----------
+        nboot: [int]
+            number of bootstrap replicates
+
+        n_jobs, executor: [int/None, Executor/None] -optional-
+            distribute the replicates (by chunks) over worker processes.
+            (see fit())
+
+        seed: [int/None] -optional-
+            seed of the replicates' random draws. The results do not
+            depend on n_jobs for a given seed.
+
+        **kwargs goes to fit(). The current fitted values (if any) are used as
+        guesses by default.
+
+        Returns
+        -------
+        FitResult (also accessible as self.bootvalues) of size nboot:
+        NAME, NAME.err for the free parameters and chi2 (and the fitok attribute).
+        """
+        nboot = int(nboot)
+        if nboot < 1:
+            raise ValueError("nboot must be at least 1 (int), %d given"%(nboot))
+        
+        if self.has_fit_run() and not is_arraylike(self.fitvalues["chi2"]):
+            kwargs = dict([("%s_guess"%k, self.fitvalues[k]) for k in self.model.freeparameters],
+                          **kwargs)
+            
+        seeds  = np.random.SeedSequence(seed).spawn(nboot)
+        chunks = [chunk for chunk in np.array_split(np.arange(nboot),
+                                                    get_nworkers(n_jobs, executor))
+                  if len(chunk)>0]
+        fitter = self._get_worker_copy_()
+        outputs = parallel_map(_bootstrap_worker_,
+                               [(fitter, [seeds[i] for i in chunk], kwargs) for chunk in chunks],
+                               n_jobs=n_jobs, executor=executor)
+        
+        self._derived_properties["bootvalues"] = FitResult.concatenate([bootvalues for bootvalues,_ in outputs])
+        for _, stats in outputs:
+            if stats is not None:
+                self.stats.merge(stats)
+        return self.bootvalues
+
+    def get_bootstrap_weights(self, seed=None):
+        """ a bootstrap replicate: the number of time each point is drawn
+        when drawing npoints points with replacement.
+
+        Parameters
+        ----------
+        seed: [int/SeedSequence/None]
+            seed of the random draw.
+
+        Returns
+        -------
+        int array (size npoints, sums to npoints)
+        """
+        draws = np.random.default_rng(seed).integers(0, self.npoints, self.npoints)
+        return np.bincount(draws, minlength=self.npoints)
+
     # ==================== #
     #    Properties        #
     # ==================== #
@@ -545,6 +1167,48 @@ class _KFolder_( BaseObject ):
     def set_used_indexes(self, indexes):
         """ Indexes of the data used for the fitting """
         self._side_properties["used_indexes"] = indexes
+        self._reset_used_data_()
+
+    @property
+    def weights(self):
+        """ weights of the data points in the log-likelihood (None if not weighted) """
+        return self._side_properties["weights"]
+
+    def set_weights(self, weights):
+        """ set the weights of the data points in the log-likelihood
+        (e.g. bootstrap counts). None means no weights. """
+        if weights is not None:
+            weights = np.asarray(weights, dtype="float")
+            if len(weights) != self.npoints:
+                raise ValueError("weights must have the size of the data (%d vs. %d)"%(len(weights),self.npoints))
+        self._side_properties["weights"] = weights
+        self._reset_used_data_()
+
+    def _get_used_data_(self, *keys):
+        """ Get the given attributes (e.g. "data", "errors") restricted to the
+        used_indexes.
+        The selections are made once (as contiguous arrays, read-only
+        if USED_DATA_READONLY) and kept until set_used_indexes() or set_data()
+        is called.
+
+        Returns
+        -------
+        tuple (one array per key)
+        """
+        if self._derived_properties["used_data"] is None:
+            self._derived_properties["used_data"] = {}
+        cache = self._derived_properties["used_data"]
+        for key in keys:
+            if key not in cache:
+                used = np.ascontiguousarray(np.asarray(getattr(self, key))[self.used_indexes])
+                if self.USED_DATA_READONLY:
+                    used.flags.writeable = False
+                cache[key] = used
+        return tuple(cache[key] for key in keys)
+
+    def _reset_used_data_(self):
+        """ drops the used-data arrays (see _get_used_data_) """
+        self._derived_properties["used_data"] = None
 
     @property
     def kfold(self):
@@ -554,6 +1218,15 @@ class _KFolder_( BaseObject ):
     def has_kfold(self):
         """ Test if the current instance has a kfold set. True means yes"""
         return self.kfold is not None
+
+    @property
+    def bootvalues(self):
+        """ fitted values of the bootstrap replicates (see bootstrap) """
+        return self._derived_properties["bootvalues"]
+
+    def has_bootstrap(self):
+        """ Test if bootstrap has been ran. True means yes"""
+        return self.bootvalues is not None
     
     @property
     def _foldindexes(self):
@@ -584,6 +1257,7 @@ class DataHandler( _KFolder_):
         self._properties["data"]   = data
         self._properties["errors"] = errors
         self._properties["names"]  = names
+        self._reset_used_data_()
         
     # ============== #
     #  Properties    #
@@ -625,6 +1299,7 @@ class DataSourceHandler( _KFolder_ ):
         data = {NAME1:{k1:v11, k2:v21 ....}, NAME2:{k1:v12, k2:v22....}, ...}
         """
         self._properties["data"] = data
+        self._reset_used_data_()
 
     # ---------- #
     #  GETTER    #
@@ -671,7 +1346,204 @@ class DataSourceHandler( _KFolder_ ):
         return len(self._orig_names)
 
 
-    
+
+###################################
+#                                 #
+#   Fit Results                   #
+#                                 #
+###################################
+
+class FitResult( object ):
+    """ Outputs of one or several (k-folding, bootstrap) fits stored in
+    preallocated arrays.
+
+    Dictionary-like access is provided (as for the former fitvalues dict):
+    NAME and NAME.err for the free parameters, chi2 and,
+    if the fold membership is stored, id (indexes of the data used by each fit).
+    If `squeeze` is True (single fit), these are floats instead of arrays.
+    The validity of the fits is the `fitok` attribute (also accessible as
+    ["fitok"] but not part of the keys).
+    """
+    __slots__ = ["freeparameters", "parameters", "errors", "covmatrices",
+                 "chi2", "fitok", "membership", "npoints", "nfilled",
+                 "squeeze", "extra"]
+
+    def __init__(self, freeparameters, nsamples=1, npoints=None, squeeze=False):
+        """
+        Parameters
+        ----------
+        freeparameters: [list of strings]
+            names of the fitted parameters
+
+        nsamples: [int]
+            number of fits stored
+
+        npoints: [int/None] -optional-
+            number of data points. If given, the data used by each fit
+            is stored (as bits, see append)
+
+        squeeze: [bool] -optional-
+            dictionary-like access returns the first value rather than the arrays.
+        """
+        nparam = len(freeparameters)
+        self.freeparameters = list(freeparameters)
+        self.parameters  = np.full((nsamples, nparam), np.nan)
+        self.errors      = np.full((nsamples, nparam), np.nan)
+        self.covmatrices = np.full((nsamples, nparam, nparam), np.nan)
+        self.chi2        = np.full(nsamples, np.nan)
+        self.fitok       = np.zeros(nsamples, dtype="bool")
+        self.npoints     = npoints
+        self.membership  = None if npoints is None else \
+          np.zeros((nsamples, (npoints+7)//8), dtype="uint8")
+        self.nfilled     = 0
+        self.squeeze     = squeeze
+        self.extra       = {}
+
+    # =================== #
+    #   Methods           #
+    # =================== #
+    def append(self, parameters, covmatrix, chi2, fitok=True, indexes=None):
+        """ store the result of one fit (parameters of shape nparam)
+        or of several ones (parameters of shape (n, nparam)) after the
+        already stored ones.
+
+        Parameters
+        ----------
+        parameters: [array]
+            best fitted values ((n,) nparam)
+
+        covmatrix: [array]
+            covariance matrix ((n,) nparam, nparam)
+
+        chi2, fitok: [float/array, bool/array]
+            chi2 and fit validity
+
+        indexes: [array/list of arrays/None] -optional-
+            indexes of the data used by the fit(s) (ignored if npoints is None)
+
+        Returns
+        -------
+        Void
+        """
+        single = np.ndim(parameters) == 1
+        parameters = np.atleast_2d(parameters)
+        nnew  = len(parameters)
+        slice_ = slice(self.nfilled, self.nfilled+nnew)
+        if slice_.stop > self.nsamples:
+            raise ValueError("FitResult is full (%d fits). Cannot add %d more"%(self.nsamples, nnew))
+
+        covmatrix = np.broadcast_to(covmatrix, (nnew,)+self.covmatrices.shape[1:])
+        self.parameters[slice_]  = parameters
+        self.covmatrices[slice_] = covmatrix
+        with np.errstate(invalid="ignore"):
+            self.errors[slice_]  = np.sqrt(np.diagonal(covmatrix, axis1=-2, axis2=-1))
+        self.chi2[slice_]  = chi2
+        self.fitok[slice_] = fitok
+        if self.membership is not None and indexes is not None:
+            for i, indexes_ in enumerate([indexes] if single else indexes):
+                mask = np.zeros(self.npoints, dtype="bool")
+                mask[indexes_] = True
+                self.membership[self.nfilled+i] = np.packbits(mask)
+        self.nfilled += nnew
+
+    def extend(self, fitresult):
+        """ append the fits stored in the given FitResult (see append) """
+        n = fitresult.nfilled
+        self.append(fitresult.parameters[:n], fitresult.covmatrices[:n],
+                    fitresult.chi2[:n], fitok=fitresult.fitok[:n],
+                    indexes=fitresult.get_indexes() if fitresult.membership is not None else None)
+
+    @staticmethod
+    def concatenate(fitresults, squeeze=False):
+        """ merge the given FitResults (in the given order) into a new one """
+        first   = fitresults[0]
+        npoints = first.npoints if first.membership is not None else None
+        merged  = FitResult(first.freeparameters, nsamples=np.sum([f.nfilled for f in fitresults]),
+                            npoints=npoints, squeeze=squeeze)
+        for fitresult in fitresults:
+            merged.extend(fitresult)
+        return merged
+
+    def get_indexes(self, i=None):
+        """ indexes of the data used for the i-th fit (all fits if i is None) """
+        if self.membership is None:
+            raise AttributeError("The fold membership has not been stored (npoints=None)")
+        if i is None:
+            return [self.get_indexes(i_) for i_ in range(self.nfilled)]
+        return np.flatnonzero(np.unpackbits(self.membership[i])[:self.npoints])
+
+    def copy(self):
+        """ dictionary of (copies of) the stored values """
+        return {k: (v.copy() if is_arraylike(v) and not isinstance(v, list) else v)
+                for k,v in self.items()}
+
+    # -------------------- #
+    # Dictionary interface #
+    # -------------------- #
+    def keys(self):
+        """ """
+        if self.nfilled == 0:
+            return []
+        keys = [k for name in self.freeparameters for k in [name, name+".err"]] + ["chi2"]
+        if self.membership is not None:
+            keys.append("id")
+        return keys + list(self.extra.keys())
+
+    def items(self):
+        """ """
+        return [(k, self[k]) for k in self.keys()]
+
+    def get(self, key, default=None):
+        """ """
+        return self[key] if key in self else default
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __getitem__(self, key):
+        if key in self.extra:
+            return self.extra[key]
+        if key == "id":
+            if self.membership is None:
+                raise KeyError(key)
+            indexes = self.get_indexes()
+            if len(set(len(i) for i in indexes)) == 1:
+                return np.asarray(indexes)
+            return indexes
+        if key == "chi2":
+            value = self.chi2
+        elif key == "fitok":
+            value = self.fitok
+        elif key.endswith(".err") and key[:-4] in self.freeparameters:
+            value = self.errors[:,self.freeparameters.index(key[:-4])]
+        elif key in self.freeparameters:
+            value = self.parameters[:,self.freeparameters.index(key)]
+        else:
+            raise KeyError(key)
+        return value[0] if self.squeeze else value[:self.nfilled]
+
+    def __setitem__(self, key, value):
+        """ additional (non-fitted) entries """
+        self.extra[key] = value
+
+    def __repr__(self):
+        return "<FitResult: %d/%d fits of %s>"%(self.nfilled, self.nsamples,
+                                                 ", ".join(self.freeparameters))
+    # =================== #
+    #   Properties        #
+    # =================== #
+    @property
+    def nsamples(self):
+        """ number of fits that could be stored """
+        return len(self.chi2)
+
+
 ###################################
 #                                 #
 #   Basic Fitter Object           #
@@ -681,8 +1553,8 @@ class DataSourceHandler( _KFolder_ ):
 class BaseFitter( BaseObject ):
     """ Mother class of the fitters """
 
-    PROPERTIES         = ["param_input","model","use_minuit"]
-    SIDE_PROPERTIES    = ["kfold", "nfold"]
+    PROPERTIES         = ["param_input","model","use_minuit","use_gradient"]
+    SIDE_PROPERTIES    = ["kfold", "nfold", "auto_guesses", "stats"]
     DERIVED_PROPERTIES = ["fitvalues","mcmc"]
     
     # ========================= #
@@ -691,8 +1563,38 @@ class BaseFitter( BaseObject ):
     def copy(self, empty=False):
         """ """
         c = super(BaseFitter, self).copy(empty=False)
-        c.set_model(self.model.__new__(self.model.__class__))
+        c._properties["model"] = self.model.copy()
+        c._link_model_()
+        c.setup_guesses()
         return c
+
+    def _get_worker_copy_(self):
+        """ light copy of the instance meant to be sent to worker processes.
+        The data are shared (not copied), the model is copied and the mcmc,
+        kfold and fit outputs are not passed.
+        """
+        c = self.__new__(self.__class__)
+        for prop in ["_properties","_side_properties","_derived_properties"]:
+            c.__dict__[prop] = self.__dict__[prop].copy()
+            
+        c._derived_properties["fitvalues"] = None
+        c._derived_properties["mcmc"]      = None
+        for k in ["kfold", "used_data", "bootvalues"]:
+            if k in c._derived_properties:
+                c._derived_properties[k] = None
+        c._properties["param_input"] = self.param_input.copy()
+        c._properties["model"]       = self.model.copy()
+        # - the workers record in their own RunStats (see merge)
+        c._side_properties["stats"]  = RunStats() if self.stats is not None else None
+        c._link_model_()
+        c.model.set_param_input(c.param_input)
+        return c
+
+    def __setstate__(self, state):
+        """ the model's links to the fitter are not pickled (see BaseModel.__getstate__) """
+        self.__dict__.update(state)
+        if self._properties.get("model", None) is not None:
+            self._link_model_()
     
     # ========================= #
     # = Main Methods          = #  
@@ -700,7 +1602,7 @@ class BaseFitter( BaseObject ):
     # ---------------
     # - Da Fit
     def fit(self,use_minuit=None, kfold=None, nsamples=1000,
-            **kwargs):
+            n_jobs=None, executor=None, use_gradient=None, **kwargs):
         """
         fit the data following the model.
 
@@ -718,12 +1620,28 @@ class BaseFitter( BaseObject ):
             For instance the fixing value concept (see set_guesses) remains with
             scipy.
 
+        use_gradient: [bool/None]
+            If None, this will use the object's current *use_gradient* value.
+            If bool, this set (and overwrite) *self.use_gradient*.
+            Should the analytic gradient of the model (if any) be given to the
+            minimizer? If False or if the model has no
+            `get_loglikelihood_gradient` method, numerical derivatives are used.
+
         // K Folding
 
         kfold: [int, None] -optional-
         
         nsamples: [int]
 
+        n_jobs: [int/None] -optional-
+            number of worker processes used to fit the folds.
+            None or 1 means that the folds are fitted serially.
+            The results are the same as those of the serial fit.
+
+        executor: [concurrent.futures.Executor] -optional-
+            if given, the fold fits are distributed using this executor
+            (n_jobs is then ignored).
+
         // Kwargs
         
         **kwargs parameter associated values with the shape:
@@ -731,17 +1649,21 @@ class BaseFitter( BaseObject ):
 
         Returns:
         --------
-        Void, create output model values.
+        Void, create output model values (fitvalues, see FitResult).
                     
         """
         if kfold is not None and DataHandler not in self.__class__.__mro__:
             raise ValueError("Only Fitter inherating from DataHandler can use k-folding. Set kfold to None")
         
-        self.setup_guesses(**kwargs)
+        step = kwargs.pop("step",1)
+        with run_phase(self.stats, "setup"):
+            self.setup_guesses(**kwargs)
         self._derived_properties["fitvalues"] = None
         
         if use_minuit is not None:
             self.use_minuit = use_minuit
+        if use_gradient is not None:
+            self.use_gradient = use_gradient
 
         # --------------
         # - Run the fit
@@ -750,22 +1672,64 @@ class BaseFitter( BaseObject ):
         if kfold is None:
             if DataHandler in self.__class__.__mro__:
                 self.set_used_indexes(np.arange(self.npoints).copy())
+            self._init_fitvalues_()
             # Da Fit
-            self._fit_(step=kwargs.pop("step",1))
+            self._fit_(step=step)
             
         # => Folding
         else:
-            self.fold_data(kfold, nsamples=nsamples)
-            for i,indexes in enumerate(self._foldindexes):
-                self.set_used_indexes(indexes)
-                # Da Fit
-                self._fit_(step=kwargs.pop("step",1))                
-                self.fitvalues.setdefault("id",[]).append(self.used_indexes)
+            with run_phase(self.stats, "setup"):
+                self.fold_data(kfold, nsamples=nsamples)
+                self._init_fitvalues_(len(self._foldindexes), folding=True)
+            if executor is None and get_nworkers(n_jobs) == 1:
+                self._fit_folds_(self._foldindexes, step=step)
+            else:
+                self._fit_folds_parallel_(self._foldindexes, step=step,
+                                          n_jobs=n_jobs, executor=executor)
 
         if DataHandler in self.__class__.__mro__:
             self.set_used_indexes(None)
         self._fit_readout_cleaning_(kfold is not None)
 
+    def _init_fitvalues_(self, nsamples=1, folding=False):
+        """ allocates the FitResult (fitvalues) for `nsamples` fits.
+        If folding, the data used by each fit are stored. """
+        self._derived_properties["fitvalues"] = \
+          FitResult(self.model.freeparameters, nsamples=nsamples,
+                    npoints=self.npoints if folding else None,
+                    squeeze=not folding)
+        
+    def _fit_folds_(self, foldindexes, step=1):
+        """ fit sequentially the data restricted to each of the given
+        indexes and stores the results in fitvalues
+        (the wall time of each fold is recorded in stats, if any) """
+        stats = self.stats
+        for indexes in foldindexes:
+            if stats is not None:
+                start = time.perf_counter()
+            self.set_used_indexes(indexes)
+            # Da Fit
+            self._fit_(step=step)
+            if stats is not None:
+                stats.add_fold(time.perf_counter() - start)
+            
+    def _fit_folds_parallel_(self, foldindexes, step=1, n_jobs=None, executor=None):
+        """ Same as _fit_folds_ but the folds are distributed (by chunks)
+        over worker processes. fitvalues are filled in the fold order.
+        """
+        nchunks = get_nworkers(n_jobs, executor)
+        chunks  = [[foldindexes[i] for i in chunk] for chunk in
+                   np.array_split(np.arange(len(foldindexes)), max(1,nchunks))
+                   if len(chunk)>0]
+        
+        outputs = parallel_map(_fit_folds_worker_,
+                               [(self._get_worker_copy_(), chunk, step) for chunk in chunks],
+                               n_jobs=n_jobs, executor=executor)
+        for fitvalues, stats in outputs:
+            self.fitvalues.extend(fitvalues)
+            if stats is not None:
+                self.stats.merge(stats)
+
     def _fit_(self, step=1):
         """ """
         if self.use_minuit:
@@ -802,13 +1766,53 @@ class BaseFitter( BaseObject ):
         -------
         float (-2*log(likelihood))
         """
+        if np.ndim(parameters) == 2:
+            # (nwalkers, nparam) array => each parameter becomes a (nwalkers, 1)
+            # array that broadcasts with the data (see BaseModel.VECTORIZED)
+            parameters = np.asarray(parameters).T[:,:,None]
+            
         self.model.setup(parameters)
         if hasattr(self.model, "get_logprob"):
             # Well structured, with priors and stuff. Should be mandatory soon
-            return -2 * self.model.get_logprob(*self._get_model_args_())
+            return -2 * self.model.get_logprob(*self._get_model_args_(),
+                                               **self._get_model_kwargs_())
         else:
-            return -2 * self.model.get_loglikelihood(*self._get_model_args_())
+            return -2 * self.model.get_loglikelihood(*self._get_model_args_(),
+                                                     **self._get_model_kwargs_())
+
+    def get_modelchi2_gradient(self, parameters):
+        """ get the gradient of the -2 log Likelihood (see get_modelchi2) with
+        respect to the model's freeparameters.
+        This requires the model to have a `get_loglikelihood_gradient()` method.
 
+        Parameters
+        ----------
+        parameters: [array]
+            a list of parameter as they could be understood
+            by self.model.setup to setup the current model.
+                                   
+        Return
+        -------
+        array (size of parameters)
+        """
+        self.model.setup(parameters)
+        return -2 * np.asarray(self.model.get_loglikelihood_gradient(*self._get_model_args_(),
+                                                                     **self._get_model_kwargs_()))
+
+    def _get_model_kwargs_(self):
+        """ keyword arguments of the model's get_loglikelihood in addition
+        to _get_model_args_: the weights of the used data, if any (see set_weights) """
+        if not isinstance(self, _KFolder_) or self.weights is None:
+            return {}
+        return {"weights": self._get_used_data_("weights")[0]}
+    
+    def has_gradient(self):
+        """ Test if the analytic gradient of the model is used for the fit.
+        (use_gradient is True and the model has a `get_loglikelihood_gradient`
+        method and no `get_logprob` one) """
+        return self.use_gradient and hasattr(self.model, "get_loglikelihood_gradient") \
+          and not hasattr(self.model, "get_logprob")
+    
     
     # --------------------- #
     # -- Da Model        -- #
@@ -829,11 +1833,22 @@ class BaseFitter( BaseObject ):
         Void, defines model and associated objects
         """
         self._properties["model"] = model
+        self._link_model_()
+        self.setup_guesses(**kwargs)
+
+    def _link_model_(self):
+        """ gives to the model the fitter's method it relies on (get_chi2).
+        If stats are recorded (see set_stats), their calls are counted. """
         try:
-            self.model.get_chi2 = self.get_modelchi2
+            if self.stats is None:
+                self.model.get_chi2 = self.get_modelchi2
+                self.model.get_chi2_gradient = self.get_modelchi2_gradient
+            else:
+                self.model.get_chi2 = self.stats.counted("chi2", self.get_modelchi2)
+                self.model.get_chi2_gradient = self.stats.counted("chi2_gradient",
+                                                                  self.get_modelchi2_gradient)
         except:
             raise ValueError(" You must define a 'get_modelchi2()' method in your fitter.")
-        self.setup_guesses(**kwargs)
 
     def get_model(self, *args):
         """ call the model.get_model() method
@@ -879,9 +1894,9 @@ class BaseFitter( BaseObject ):
         return f
 
     def get_fval(self):
+        """ -2 log likelihood (chi2) at the minimum found by the last fit
         """
-        """
-        if not self.has_fit_run():
+        if not hasattr(self, "_fitparams"):
             raise AttributeError("You should fit first !")
         
         return self.minuit.fval if self.use_minuit else \
@@ -930,7 +1945,10 @@ class BaseFitter( BaseObject ):
         ---------
         **kwargs the v_guess, v_boundaries and, v_fixed for as many
         `v` (from the model.freeparameter list).
-        All the non-given `v` values will be filled either by pre-existing
+        The guesses of the (non-fixed) parameters that have never been given
+        are estimated from the data by the model's initial_guess()
+        (see get_initial_guesses) and updated at each call.
+        All the other non-given `v` values will be filled either by pre-existing
         values in the model or with: 0 for _guess, False for _fixed, and
         [None,None] for _boundaries
 
@@ -946,6 +1964,8 @@ class BaseFitter( BaseObject ):
         # -- In there, all the model already has
         if not self.is_input_set():
             self._properties['param_input'] = self.model.get_param_input()
+            # the model's default guesses could be improved by the data
+            self._side_properties["auto_guesses"] = list(self.model.freeparameters)
         
         # -- Then, whatever you gave
         for k,v in kwargs.items():
@@ -959,6 +1979,18 @@ class BaseFitter( BaseObject ):
                 raise ValueError("I am not able to parse %s ; not _guess, _fixed nor _boundaries"%k)
             self.param_input[k] = v
 
+        # -- Data driven guesses for the one you did not give
+        auto_guesses = [name for name in self.model.freeparameters
+                        if name+"_guess" not in kwargs and
+                           not self.param_input.get(name+"_fixed", False) and
+                           (name+"_guess" not in self.param_input or name in self.auto_guesses)]
+        if len(auto_guesses)>0:
+            guesses = self.get_initial_guesses()
+            for name in auto_guesses:
+                if name in guesses and np.all(np.isfinite(guesses[name])):
+                    self.param_input[name+"_guess"] = guesses[name]
+        self._side_properties["auto_guesses"] = auto_guesses
+        
         # -- Finally if no values have been set, let's do it
         for name in self.model.freeparameters:
             if name+"_guess" not in self.param_input.keys():
@@ -970,11 +2002,58 @@ class BaseFitter( BaseObject ):
             # -- and give it to the model
         self.model.set_param_input(self.param_input)
           
+    def get_initial_guesses(self):
+        """ data driven guesses of the model parameters
+        (see the model's initial_guess method)
+
+        Returns
+        -------
+        dict (parametername: value)
+        """
+        return self.model.initial_guess(*self._get_model_args_(), **self._get_model_kwargs_())
+
+    def set_stats(self, stats=True, callback=None):
+        """ record what the fits spend their time on: number of calls of
+        the -2 log likelihood (chi2) and of its gradient, wall time of
+        the fit phases (setup, minimize, errors and readout) and of each
+        fold of a k-folding. The mcmc set afterwards records in the same
+        RunStats (see MCMC.set_stats).
+        Nothing is recorded by default (no overhead).
+
+        Parameters
+        ----------
+        stats: [bool/RunStats/None]
+            True to record in a new RunStats, a RunStats to record in it,
+            None or False to stop recording.
+
+        callback: [function/None] -optional-
+            called as callback(name, elapsed, stats) at the end of each phase
+            and fold (see RunStats). Ignored if a RunStats is given.
+
+        Returns
+        -------
+        RunStats (or None), also accessible as self.stats
+        """
+        if stats is True:
+            stats = RunStats(callback=callback)
+        elif stats is False:
+            stats = None
+        elif stats is not None and not isinstance(stats, RunStats):
+            raise TypeError("stats must be a bool, None or a RunStats (%s given)"%type(stats))
+        
+        self._side_properties["stats"] = stats
+        if self.is_model_set():
+            self._link_model_()
+        if self.has_mcmc():
+            self.mcmc.set_stats(stats)
+        return stats
+    
     # ------------------- #
     # - Bayes & MCMC    - #
     # ------------------- #
     def run_mcmc(self,nrun=2000, walkers_per_dof=4,
-                 init=None, init_err=None, verbose=True):
+                 init=None, init_err=None, verbose=True,
+                 n_jobs=None, pool=None, backend=None, converge=False, **kwargs):
         """ run mcmc from the emcee python code. This might take time
 
         Parameters
@@ -986,6 +2065,21 @@ class BaseFitter( BaseObject ):
             number of walker by degree of freedom (int of nparameter*this used)
             walkers_per_dof should be greater than 2.
 
+        n_jobs, pool: [int/None, Pool/None] -optional-
+            evaluate the walkers in parallel worker processes.
+            (see MCMC.run)
+
+        backend: [string] -optional-
+            HDF5 file where the chain is stored while running (see MCMC.set_backend).
+            Use resume=True to continue an interrupted run.
+
+        converge: [bool] -optional-
+            stop the run (nrun is then a maximum) once the autocorrelation
+            time converged. The burnin and thin are then set automatically.
+            kwargs goes to MCMC.run (ntau, check_every, tau_rtol, resume,
+            or streaming, burnin, nreservoir for the low memory mode,
+            and rng for the initial positions of the walkers)
+
         Returns
         -------
         Void (fill the self.mcmc property)
@@ -993,19 +2087,31 @@ class BaseFitter( BaseObject ):
         # -------------
         # - Load MCMC
         self.setup_mcmc(nrun=nrun, walkers_per_dof=walkers_per_dof,
-                        init=init, init_err=init_err)
+                        init=init, init_err=init_err,
+                        n_jobs=n_jobs, pool=pool, backend=backend)
         
         # -------------
         # - And run it
-        self.mcmc.run(verbose=verbose)
+        self.mcmc.run(verbose=verbose, converge=converge, **kwargs)
         
     def setup_mcmc(self, nrun=2000, walkers_per_dof=4,
-                 init=None, init_err=None, verbose=True):
+                 init=None, init_err=None, verbose=True,
+                 n_jobs=None, pool=None, backend=None):
         """ Setup the basic property for the mcmc to run, you just need to say self.mcmc.run()
             to run it. See also self.run_mcmc()
+
+        The mcmc's lnprob is bound to a light copy of this instance
+        (see _get_worker_copy_), so it could be sent to the pool's workers.
         """
-        self._derived_properties["mcmc"] = MCMC(self.model.lnprob, self.model.freeparameters,
-                                                boundaries_poswalkers=self._mcmc_initbounds)
+        lnprob_fitter = self._get_worker_copy_()
+        lnprob_fitter.set_stats(None) # the mcmc counts the lnprob evaluations
+        self._derived_properties["mcmc"] = MCMC(lnprob_fitter._mcmc_lnprob_,
+                                                self.model.freeparameters,
+                                                boundaries_poswalkers=self._mcmc_initbounds,
+                                                vectorize=self.model.VECTORIZED)
+        self.mcmc.set_pool(pool=pool, n_jobs=n_jobs)
+        self.mcmc.set_stats(self.stats)
+        self.mcmc.set_backend(backend)
         
         
         # -------------
@@ -1022,6 +2128,11 @@ class BaseFitter( BaseObject ):
                         guess_err = guess_err)
         
         
+    def _mcmc_lnprob_(self, parameters):
+        """ the model's lnprob. (Bound to the fitter so that pickling it
+        carries the data and the model's link to the fitter) """
+        return self.model.lnprob(parameters)
+        
     def set_mcmc_burnin(self, burnin):
         """ set the burnin value above which the walkers are consistants.
         This is required to access the `samples`
@@ -1115,13 +2226,15 @@ class BaseFitter( BaseObject ):
     # - fit associated values
     @property
     def fitvalues(self):
-        """ dictionary containing the best-fitted values """
+        """ FitResult containing the best-fitted values (dictionary-like access,
+        see FitResult) """
         if self._derived_properties["fitvalues"] is None:
-            self._derived_properties["fitvalues"] = {}
+            self._init_fitvalues_(0)
         return self._derived_properties["fitvalues"]
 
     def has_fit_run(self):
-        return len(list(self.fitvalues.keys()))>0
+        return self._derived_properties["fitvalues"] is not None and \
+          self.fitvalues.nfilled>0
 
     @property
     def use_minuit(self):
@@ -1133,6 +2246,18 @@ class BaseFitter( BaseObject ):
     def use_minuit(self,use_minuit_bool):
         """ set the use_minuit value """
         self._properties["use_minuit"] = bool(use_minuit_bool)
+
+    @property
+    def use_gradient(self):
+        """ shall the analytic gradient of the model be used (if any) """
+        if self._properties["use_gradient"] is None:
+            self._properties["use_gradient"] = True
+        return self._properties["use_gradient"]
+    
+    @use_gradient.setter
+    def use_gradient(self,use_gradient_bool):
+        """ set the use_gradient value """
+        self._properties["use_gradient"] = bool(use_gradient_bool)
         
     # -----------------------
     # Guess / Boundaries etc
@@ -1151,6 +2276,19 @@ class BaseFitter( BaseObject ):
         """ Test if you set the parameters inputs """
         return len(list(self.param_input.keys()))>0
     
+    @property
+    def auto_guesses(self):
+        """ names of the parameters which guesses come from the data
+        (see setup_guesses) """
+        if self._side_properties["auto_guesses"] is None:
+            self._side_properties["auto_guesses"] = []
+        return self._side_properties["auto_guesses"]
+    
+    @property
+    def stats(self):
+        """ RunStats recording the calls and timings of the fits (see set_stats) """
+        return self._side_properties["stats"]
+    
     @property
     def paramguess(self):
         """ guess put for the fit """
@@ -1238,38 +2376,36 @@ class BaseFitter( BaseObject ):
     # ====================== #
     def _fit_readout_(self, kfolding=False):
         """ Gather the output in the readout, you could improve that in you child class"""
-        
-        for i,name in enumerate(self.model.freeparameters):
-            self.fitvalues.setdefault(name,[]).append(self._fitparams[i])
-            self.fitvalues.setdefault(name+".err",[]).append(np.sqrt(self.covmatrix[i,i]))
-                
-        # -- Additional data -- #
-        self.fitvalues.setdefault("chi2",[]).append(self.get_fval())
+        if self._derived_properties["fitvalues"] is None:
+            self._init_fitvalues_()
+        fitvalues = self.fitvalues
+        with run_phase(self.stats, "errors"):
+            covmatrix = self.covmatrix
+        with run_phase(self.stats, "readout"):
+            fitvalues.append(self._fitparams, covmatrix, self.get_fval(),
+                             fitok=self.fitOk,
+                             indexes=self.used_indexes if fitvalues.membership is not None else None)
 
     def _fit_readout_cleaning_(self, folding):
-        """ """
-        if not folding:
-            # no folding so cleaning the fitvalue
-            for k,v in self.fitvalues.items():
-                self.fitvalues[k] = v[0] if is_arraylike(v) else v
-        else:
-            for k,v in self.fitvalues.items():
-                self.fitvalues[k] = np.asarray(v)
+        """ checks that all the expected fits have been stored """
+        if self.fitvalues.nfilled != self.fitvalues.nsamples:
+            warnings.warn("%d fits stored while %d expected"%(self.fitvalues.nfilled,
+                                                              self.fitvalues.nsamples))
     # --------------
     #  Minuit
     # --------------    
     def _fit_minuit_(self,verbose=False, step=1):
         """
         """
-        self._setup_minuit_(step=step)
+        with run_phase(self.stats, "setup"):
+            self._setup_minuit_(step=step)
         if verbose: print("STARTS MINUIT FIT")
-        self._migrad_output_ = self.minuit.migrad()
+        with run_phase(self.stats, "minimize"):
+            self._migrad_output_ = self.minuit.migrad()
         
-        if self._migrad_output_[0]["is_valid"] is False:
+        self.fitOk = self._migrad_output_[0]["is_valid"] is not False
+        if not self.fitOk:
             warnings.warn("migrad is not valid")
-            self.fitOk = False
-        elif verbose:
-            self.fitOk = True
             
         self._fitparams = np.asarray([self.minuit.values[k]
                               for k in self.model.freeparameters])
@@ -1280,16 +2416,12 @@ class BaseFitter( BaseObject ):
         if "_guesses" not in dir(self):
             self.setup_guesses()
         
-        # == Minuit Keys == #
-        minuit_kwargs = {}
-        for param in self.model.freeparameters:
-            minuit_kwargs[param]           = self.param_input["%s_guess"%param]
-            minuit_kwargs["limit_"+param]  = self.param_input["%s_boundaries"%param]
-            minuit_kwargs["fix_"+param]    = self.param_input["%s_fixed"%param]
-
-        self.minuit = Minuit(self.model._minuit_chi2_,
-                             print_level=print_level,errordef=step,
-                             **minuit_kwargs)
+        # == Minuit array-call == #
+        self.minuit = Minuit.from_array_func(self.model._minuit_chi2_, self.paramguess,
+                             limit=self.parambounds, fix=self.paramfixed,
+                             name=self.model.freeparameters,
+                             grad=self.model._minuit_chi2_gradient_ if self.has_gradient() else None,
+                             print_level=print_level,errordef=step)
     # ----------------
     #  Scipy
     # ----------------
@@ -1297,9 +2429,12 @@ class BaseFitter( BaseObject ):
         """ fit using scipy """
         
         from scipy.optimize import minimize
-        self._setup_scipy_()
-        self.scipy_output = minimize(self.model._scipy_chi2_,
-                                    self._paramguess_scipy,bounds=self._parambounds_scipy)
+        with run_phase(self.stats, "setup"):
+            self._setup_scipy_()
+        with run_phase(self.stats, "minimize"):
+            self.scipy_output = minimize(self.model._scipy_chi2_,
+                                    self._paramguess_scipy,bounds=self._parambounds_scipy,
+                                    jac=self.model._scipy_chi2_gradient_ if self.has_gradient() else None)
                 
         self._fitparams = self.model._read_scipy_parameter_(self.scipy_output["x"])
         self.fitOk         = True
@@ -1310,6 +2445,24 @@ class BaseFitter( BaseObject ):
           self.model._parameter2scipyparameter_(self.paramguess,self.parambounds)
 
 
+def _bootstrap_worker_(fitter, seeds, fitkwargs={}):
+    """ fit the bootstrap replicates drawn from the given seeds
+    (see _KFolder_.bootstrap). Returns a FitResult and the fitter's stats """
+    bootvalues = FitResult(fitter.model.freeparameters, nsamples=len(seeds))
+    for seed in seeds:
+        fitter.set_weights(fitter.get_bootstrap_weights(seed))
+        fitter.fit(**fitkwargs)
+        bootvalues.extend(fitter.fitvalues)
+    return bootvalues, fitter.stats
+
+def _fit_folds_worker_(fitter, foldindexes, step):
+    """ fit the given folds with the given fitter and returns its fitvalues
+    and stats. (module level function to be picklable, see BaseFitter._fit_folds_parallel_)
+    """
+    fitter._init_fitvalues_(len(foldindexes), folding=True)
+    fitter._fit_folds_(foldindexes, step=step)
+    return fitter.fitvalues, fitter.stats
+
 ###################################
 #                                 #
 #   Basic Model Object            #
@@ -1323,26 +2476,24 @@ class BaseModel( BaseObject ):
     SIDE_PROPERTIES    = ["param_input"]
     DERIVED_PROPERTIES = []
     
+    # methods given by the fitter, see BaseFitter._link_model_
+    _FITTER_LINKS      = ["get_chi2", "get_chi2_gradient"]
+
+    # Set this to True if the model's likelihood and prior broadcast
+    # (nwalkers, 1)-shaped parameters against the data and sum the
+    # likelihood over the last axis. lnprob then accepts (nwalkers, nparam) arrays.
+    VECTORIZED = False
+    
     # =================== #
     # = Initialization  = #
     # =================== #
-    def __new__(cls,*arg,**kwargs):
-        """ Upgrade of the New function to enable the
-        the _minuit_ black magic
-        """
-        obj = super(BaseModel,cls).__new__(cls)
-        
-        exec("@make_method(BaseModel)\n"+\
-             "def _minuit_chi2_(self,%s): \n"%(", ".join(obj.FREEPARAMETERS))+\
-             "    parameters = %s \n"%(", ".join(obj.FREEPARAMETERS))+\
-             "    return self.get_chi2(parameters)\n")
-
-        #exec("@make_method(BaseModel)\n"+\
-        #     "def _minuit_lnprob_(self,%s): \n"%(", ".join(obj.FREEPARAMETERS))+\
-        #     "    parameters = %s \n"%(", ".join(obj.FREEPARAMETERS))+\
-        #     "    return self.lnprob(parameters)\n")
-
-        return obj
+    def __getstate__(self):
+        """ The links to the fitter (see BaseFitter._link_model_) are not
+        part of the model's state. """
+        state = self.__dict__.copy()
+        for k in self._FITTER_LINKS:
+            state.pop(k, None)
+        return state
     
     # =================== #
     # = Fitter Methods  = #
@@ -1355,6 +2506,19 @@ class BaseModel( BaseObject ):
         """
         raise NotImplementedError("The Model has no get_model() defined. Do so.")
 
+    def initial_guess(self, *args, **kwargs):
+        """ cheap data-driven estimate of the parameters, used as
+        guesses of the fit when these are not given (see BaseFitter.setup_guesses).
+        args and kwargs are those of get_loglikelihood.
+
+        This function should be defined by the inheriting models.
+
+        Returns
+        -------
+        dict (parametername: value) ; empty by default.
+        """
+        return {}
+    
     def get_param_input(self):
         """ return a pseudo param_input dictionary using the currently
         known parameter information (_guess, _fixed, _boundaries).
@@ -1388,13 +2552,33 @@ class BaseModel( BaseObject ):
         """ This is the Bayesian posterior function (in log).
         it returns  lnprior - 0.5*Chi2
         (Assuming Chi2 = -2logLikelihood)
+
+        parameters could also be a (nwalkers, nparam) array, the 
+        nwalkers lnprob are then returned.
         """
+        if np.ndim(parameters) == 2:
+            return self._lnprob_vectorized_(np.asarray(parameters))
+        
         priors = self.lnprior(parameters)
         if not np.isfinite(priors):
             return -np.inf
         # not sure it works with the _minuit_chi2_/_scipy_chi2_  tricks
         return priors - 0.5*self.get_chi2(parameters)
 
+    def _lnprob_vectorized_(self, parameters):
+        """ lnprob for a (nwalkers, nparam) array. The likelihood is computed
+        at once for all the walkers within the prior if the model is VECTORIZED,
+        one walker at the time otherwise. """
+        if not self.VECTORIZED:
+            return np.asarray([self.lnprob(p) for p in parameters])
+        
+        priors = np.asarray(self.lnprior(parameters), dtype="float") * np.ones(len(parameters))
+        lnprob = np.full(len(parameters), -np.inf)
+        flagok = np.isfinite(priors)
+        if flagok.any():
+            lnprob[flagok] = priors[flagok] - 0.5*self.get_chi2(parameters[flagok])
+        return lnprob
+
     # ==================== #
     # = Properties       = #
     # ==================== #
@@ -1470,6 +2654,19 @@ class BaseModel( BaseObject ):
             
         return hess
 
+    # -------------------
+    #   Minuit
+    # -------------------
+    # Minuit array-call: the parameter names are given to
+    # Minuit (see BaseFitter._setup_minuit_)
+    def _minuit_chi2_(self,parameters):
+        """ -2 log Likelihood for the given parameter array """
+        return self.get_chi2(parameters)
+    
+    def _minuit_chi2_gradient_(self,parameters):
+        """ gradient of _minuit_chi2_ (same arguments) """
+        return self.get_chi2_gradient(parameters)
+    
     # -------------------
     #   Scipy
     # -------------------
@@ -1480,6 +2677,16 @@ class BaseModel( BaseObject ):
         parameter = self._read_scipy_parameter_(parameter)
         return self.get_chi2(parameter)
 
+    def _scipy_chi2_gradient_(self,parameter):
+        """ gradient of _scipy_chi2_ (fixed parameters removed)
+        """
+        grad = self.get_chi2_gradient(self._read_scipy_parameter_(parameter))
+        if len(parameter) == len(self.freeparameters):
+            return grad
+        
+        return np.asarray([g for name,g in zip(self.freeparameters, grad)
+                           if getattr(self, "%s_fixed"%name, False) is False])
+    
     def _read_scipy_parameter_(self,parameter):
         """ works opposingly to _parameter2scipyparameter_
         it fills the missing values (the fixed one) with the
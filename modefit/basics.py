@@ -2,11 +2,11 @@
 # -*- coding: utf-8 -*-
 
 """ Basic Filters """
+import time
 import warnings
 import numpy as np
-from scipy.special import orthogonal
-from scipy import stats
-from .baseobjects import BaseModel, BaseFitter, DataHandler
+from .baseobjects import BaseModel, BaseFitter, DataHandler, FitResult
+from .utils       import weighted_sum, run_phase
 
 __all__ = ["get_polyfit", "get_normpolyfit"]
 
@@ -83,14 +83,19 @@ def get_normpolyfit(x, y, dy, degree, ngauss,
 class PolynomeFit( BaseFitter, DataHandler ):
     """ """
     PROPERTIES         = ["xdata"]
-    DERIVED_PROPERTIES = ["xscaled"]
+    SIDE_PROPERTIES    = ["use_wls"]
+    DERIVED_PROPERTIES = ["xscaled","linear_output"]
 
     def __init__(self, x, y, dy, degree,
-                 names=None, legendre=True):
-        """ """
+                 names=None, legendre=True, use_wls=True):
+        """ 
+        use_wls: [bool] -optional-
+            fit the (linear) model by weighted least squares (exact, no
+            minimizer) when no parameter is bounded or fixed.
+        """
         self.set_data(x, y, dy)
-        self.set_model(polynomial_model(degree), use_legendre=legendre)
-        self.model.set_xsource(x)
+        self.set_model(polynomial_model(degree), use_legendre=legendre, xsource=x)
+        self.use_wls = use_wls
         
     # ============== #
     #  Main Methods  #
@@ -99,6 +104,111 @@ class PolynomeFit( BaseFitter, DataHandler ):
     def _get_model_args_(self):
         """ see model.get_loglikelihood"""
         return self.data, self.errors
+
+    def _get_model_kwargs_(self):
+        """ The full data are given to the model (see _get_model_args_), the
+        points not in used_indexes are thus given a weight of 0 """
+        if self.weights is None and len(self.used_indexes) == self.npoints:
+            return {}
+        
+        if self._derived_properties["used_data"] is None:
+            self._derived_properties["used_data"] = {}
+        cache = self._derived_properties["used_data"]
+        if "full_weights" not in cache:
+            weights = np.zeros(self.npoints)
+            weights[self.used_indexes] = 1 if self.weights is None else self.weights[self.used_indexes]
+            cache["full_weights"] = weights
+        return {"weights": cache["full_weights"]}
+    
+    def fit_many(self, y, dy=None):
+        """ weighted least squares fit of several data vectors sharing the
+        same x (see PolyModel.solve_wls). This does not change the instance.
+
+        Parameters
+        ----------
+        y: [2d-array]
+            (nvectors, npoints) data to fit.
+
+        dy: [array/2d-array/None] -optional-
+            errors on the data (npoints or (nvectors, npoints)).
+            If None, self.errors is used.
+
+        Returns
+        -------
+        FitResult (fitvalues format) of size nvectors:
+        NAME, NAME.err for the free parameters and chi2.
+        """
+        if not self.model.LINEAR:
+            raise TypeError("fit_many requires a linear model (no %s)"%self.model.__class__.__name__)
+        
+        parameters, covmatrix, chi2 = self.model.solve_wls(y, self.errors if dy is None else dy)
+        fitvalues = FitResult(self.model.freeparameters, nsamples=len(parameters))
+        fitvalues.append(parameters, covmatrix, chi2)
+        return fitvalues
+    
+    def _fit_(self, step=1):
+        """ weighted least squares if possible (see use_wls), the BaseFitter's fit otherwise """
+        self._derived_properties["linear_output"] = None
+        if not self._is_wls_fittable_():
+            return super(PolynomeFit, self)._fit_(step=step)
+        
+        weights = None if self.weights is None else self._get_used_data_("weights")[0]
+        y, dy   = self._get_used_data_("data","errors")
+        with run_phase(self.stats, "minimize"):
+            parameters, covmatrix, chi2 = self.model.solve_wls(y, dy, weights=weights,
+                                                               indexes=self.used_indexes)
+        self._derived_properties["linear_output"] = {"parameters":parameters,
+                                                     "covmatrix":covmatrix,
+                                                     "chi2":chi2}
+        self._fitparams = parameters
+        self.model.setup(parameters)
+        self.fitOk = True
+        self._fit_readout_()
+
+    def _fit_folds_(self, foldindexes, step=1):
+        """ weighted least squares of all the folds at once (see PolyModel.solve_wls_folds)
+        if possible (see use_wls), the BaseFitter's sequential fits otherwise """
+        self._derived_properties["linear_output"] = None
+        if not self._is_wls_fittable_():
+            return super(PolynomeFit, self)._fit_folds_(foldindexes, step=step)
+        
+        with run_phase(self.stats, "minimize"):
+            parameters, covmatrix, chi2 = self.model.solve_wls_folds(self.data, self.errors, foldindexes,
+                                                                     weights=self.weights,
+                                                                     stats=self.stats)
+        with run_phase(self.stats, "readout"):
+            self.fitvalues.append(parameters, covmatrix, chi2, indexes=foldindexes)
+        # - as if the folds were fitted one after the other
+        self._derived_properties["linear_output"] = {"parameters":parameters[-1],
+                                                     "covmatrix":covmatrix[-1],
+                                                     "chi2":chi2[-1]}
+        self._fitparams = parameters[-1]
+        self.model.setup(self._fitparams)
+        self.fitOk = True
+
+    def _fit_folds_parallel_(self, foldindexes, step=1, n_jobs=None, executor=None):
+        """ the weighted least squares fit of the folds is vectorized (see _fit_folds_),
+        so the folds are distributed over worker processes only for the minimizer fits """
+        if self._is_wls_fittable_():
+            return self._fit_folds_(foldindexes, step=step)
+        return super(PolynomeFit, self)._fit_folds_parallel_(foldindexes, step=step,
+                                                             n_jobs=n_jobs, executor=executor)
+        
+    def _is_wls_fittable_(self):
+        """ Can the model be fitted by weighted least squares? i.e.:
+        use_wls, linear model and no bounded or fixed parameters """
+        if not self.use_wls or not self.model.LINEAR:
+            return False
+        if np.any(self.paramfixed):
+            return False
+        return np.all([bounds is None or np.all([b is None for b in bounds])
+                       for bounds in self.parambounds])
+    
+    def get_fval(self):
+        """ -2 log likelihood (chi2) of the fit """
+        if self.linear_output is not None:
+            return self.linear_output["chi2"]
+        return super(PolynomeFit, self).get_fval()
     
     # - Super It
     def set_data(self, x, y, dy=None, names=None):
@@ -107,10 +217,14 @@ class PolynomeFit( BaseFitter, DataHandler ):
         self._derived_properties["xscaled"]  = (x-np.min(x))/(np.max(x)-np.min(x))*2-1.
         super(PolynomeFit, self).set_data(y, errors=dy, names=names)
 
-    def set_model(self, model, use_legendre=True, **kwargs):
-        """ """
+    def set_model(self, model, use_legendre=True, xsource=None, **kwargs):
+        """ load the model (see BaseFitter.set_model).
+        use_legendre and xsource (default xdata) are set to the model before
+        the guesses are set up (these could depend on the data, see setup_guesses)
+        """
+        model.use_legendre = use_legendre
+        model.set_xsource(self.xdata if xsource is None else xsource)
         super(PolynomeFit, self).set_model(model, **kwargs)
-        self.model.use_legendre=use_legendre
 
     def _display_data_(self, ax, ecolor="0.3", **prop):
         """ """
@@ -193,6 +307,28 @@ class PolynomeFit( BaseFitter, DataHandler ):
     def _scaled_xdata(self):
         """ You that to fit the data"""
         return self._derived_properties["xscaled"]
+
+    @property
+    def use_wls(self):
+        """ Shall the weighted least squares be used when possible (see _fit_) """
+        return self._side_properties["use_wls"] is not False
+
+    @use_wls.setter
+    def use_wls(self, value):
+        self._side_properties["use_wls"] = bool(value)
+
+    @property
+    def linear_output(self):
+        """ parameters, covmatrix and chi2 of the last weighted least squares fit
+        (None if the last fit used the minimizer) """
+        return self._derived_properties["linear_output"]
+
+    @property
+    def covmatrix(self):
+        """ coveriance matrix after the fit """
+        if self.linear_output is not None:
+            return self.linear_output["covmatrix"]
+        return super(PolynomeFit, self).covmatrix
     
 
 class NormPolynomeFit( PolynomeFit ):
@@ -203,8 +339,7 @@ class NormPolynomeFit( PolynomeFit ):
         self.__build__()
         self.set_data(x, y, dy)
         self.set_model(normal_and_polynomial_model(degree, ngauss),
-                           use_legendre=legendre)
-        self.model.set_xsource(x)
+                       use_legendre=legendre, xsource=x)
         
     def _display_data_(self, ax, ecolor="0.3", **prop):
         """ """
@@ -248,6 +383,9 @@ class NormPolynomeFit( PolynomeFit ):
 #                          #
 ############################
 
+# Model classes are built once per degree (and ngauss)
+_MODEL_CLASSES = {}
+
 def polynomial_model(degree):
     """ 
     This function builds and returns the Model used to fit the
@@ -257,30 +395,90 @@ def polynomial_model(degree):
     -------
     Child of ModelStandardization (with set  STANDARDIZATION)
     """
-    class N_PolyModel( PolyModel ):
-        DEGREE = degree
+    return get_polynomial_modelclass(degree)()
 
-    return N_PolyModel()
+def get_polynomial_modelclass(degree):
+    """ The PolyModel class for the given degree.
+    The class is created at the first call and cached afterwards.
+    """
+    key = ("PolyModel", degree)
+    if key not in _MODEL_CLASSES:
+        class N_PolyModel( PolyModel ):
+            _FACTORY_KEY = key
+            DEGREE = degree
+            FREEPARAMETERS = ["a%d"%(i) for i in range(degree)]
+            
+        _MODEL_CLASSES.setdefault(key, N_PolyModel)
+    return _MODEL_CLASSES[key]
+
+def get_polynomial_basis(x, degree, legendre=True):
+    """ design matrix of the polynomial model: the `degree` first
+    Legendre polynomials (three-term recurrence) or powers of x (running products)
+    evaluated at x.
+
+    Parameters
+    ----------
+    x: [array]
+        where the basis is evaluated (should be in [-1,1] for Legendre)
+
+    degree: [int]
+        number of polynomials (degree 1 means constant)
+
+    legendre: [bool] -optional-
+        Legendre polynomials if True, x**i otherwise.
+
+    Returns
+    -------
+    array (len(x), degree)
+    """
+    x = np.asarray(x, dtype="float")
+    basis = np.empty((len(x), degree))
+    if degree > 0:
+        basis[:,0] = 1
+    if degree > 1:
+        basis[:,1] = x
+    for n in range(1, degree-1):
+        if legendre:
+            # (n+1) P_{n+1} = (2n+1) x P_n - n P_{n-1}
+            basis[:,n+1] = ((2*n+1) * x * basis[:,n] - n * basis[:,n-1]) / (n+1)
+        else:
+            basis[:,n+1] = x * basis[:,n]
+    return basis
+
+def _new_factory_model_(key):
+    """ empty instance of the model class build by the factory
+    corresponding to `key`. (used to unpickle the models) """
+    if key[0] == "PolyModel":
+        modelclass = get_polynomial_modelclass(*key[1:])
+    else:
+        modelclass = get_normal_and_polynomial_modelclass(*key[1:])
+    return modelclass.__new__(modelclass)
 
 
 class PolyModel( BaseModel ):
     """ Virtual Class able to handle any polynomial order fitter """
     DEGREE = 0
+    FREEPARAMETERS = []
+    # the model is linear in its parameters (see solve_wls)
+    LINEAR = True
     
     PROPERTIES         = ["parameters",
                           "xsource","xsource_start","xsource_steps"]
     SIDE_PROPERTIES    = ["legendre"]
-    DERIVED_PROPERTIES = ["xsource_scaled"]
+    DERIVED_PROPERTIES = ["xsource_scaled","design_matrix"]
 
     # ================ #
     #  Main Method     #
     # ================ #
-    def __new__(cls,*arg,**kwarg):
-        """ Black Magic allowing generalization of Polynomial models """
-        
-        cls.FREEPARAMETERS = ["a%d"%(i) for i in range(cls.DEGREE)]
-        return super(PolyModel,cls).__new__(cls)
-
+    def __reduce_ex__(self, protocol):
+        """ The classes built by the model factories (e.g. polynomial_model)
+        are not importable, so they are rebuilt from their factory when unpickled.
+        """
+        key = getattr(self.__class__, "_FACTORY_KEY", None)
+        if key is None or _MODEL_CLASSES.get(key) is not self.__class__:
+            return super(PolyModel, self).__reduce_ex__(protocol)
+        return (_new_factory_model_, (key,), self.__getstate__())
+    
     # ---------------- #
     #  To Be Defined   #
     # ---------------- #
@@ -305,22 +503,149 @@ class PolyModel( BaseModel ):
         if x is not None:
             self.set_xsource(x)
             
-        if self.use_legendre:            
-            model = np.asarray([orthogonal.legendre(i)(self.xsource_scaled) for i in range(self.DEGREE)])
+        return np.dot(self.design_matrix, self.parameters.T).T
+    
+    def solve_wls(self, y, dy, weights=None, indexes=None):
+        """ weighted least squares solution (QR decomposition of the weighted
+        design matrix) for the data y (errors dy) at xsource.
+
+        Parameters
+        ----------
+        y: [array/2d-array]
+            data (npoints) or several data vectors (nvectors, npoints)
+
+        dy: [array/2d-array]
+            errors on y (npoints, or (nvectors, npoints))
+
+        weights: [array/None] -optional-
+            weights of the data points in the chi2 (e.g. bootstrap counts)
+
+        indexes: [array/None] -optional-
+            if given, only the design matrix rows of these indexes are used
+            (y and dy must then be restricted to them)
+
+        Returns
+        -------
+        parameters (DEGREE or (nvectors, DEGREE)),
+        covariance matrix (DEGREE, DEGREE) or (nvectors, DEGREE, DEGREE),
+        chi2 (float or nvectors)
+        """
+        design = self.design_matrix if indexes is None else self.design_matrix[indexes]
+        y, dy  = np.asarray(y, dtype="float"), np.asarray(dy, dtype="float")
+        sqrtw  = 1./dy if weights is None else np.sqrt(weights)/dy
+        yw     = y * sqrtw
+        if np.ndim(sqrtw) == 1:
+            # - one decomposition for all the vectors
+            q, r = np.linalg.qr(design * sqrtw[:,None])
+            parameters = np.linalg.solve(r, np.dot(q.T, yw.T)).T
+            rinv = np.linalg.inv(r)
+            covmatrix = np.dot(rinv, rinv.T)
+            residuals = yw - np.dot(parameters, (design * sqrtw[:,None]).T)
         else:
-            model = np.asarray([self.xfit**i for i in range(self.DEGREE)])
+            designw = design * sqrtw[...,None]
+            q, r = np.linalg.qr(designw)
+            parameters = np.linalg.solve(r, np.einsum("...ji,...j->...i", q, yw)[...,None])[...,0]
+            rinv = np.linalg.inv(r)
+            covmatrix = np.einsum("...ij,...kj->...ik", rinv, rinv)
+            residuals = yw - np.einsum("...ij,...j->...i", designw, parameters)
             
-        return np.dot(model.T, self.parameters.T).T
-    
-    def get_loglikelihood(self, y, dy, x=None):
+        return parameters, covmatrix, np.sum(residuals**2, axis=-1)
+
+    def solve_wls_folds(self, y, dy, foldindexes, weights=None, cond_max=1e6, stats=None):
+        """ weighted least squares solutions for several subsets (folds) of the data.
+
+        The normal equations of the full dataset are computed once. For each
+        fold, only the contributions of its held-out points are removed
+        (downdating), or those of its points are summed if they are fewer.
+        The folds with ill-conditioned normal equations (e.g. high degree
+        simple polynomials) are solved by QR decomposition, as single fits (see solve_wls).
+
+        Parameters
+        ----------
+        y, dy: [array, array]
+            data and errors (npoints, at xsource)
+
+        foldindexes: [list of arrays]
+            indexes of the data used by each fold (see _KFolder_.fold_data)
+
+        weights: [array/None] -optional-
+            weights of the data points in the chi2
+
+        cond_max: [float] -optional-
+            folds whose normal equations have a larger condition number
+            are solved by QR decomposition.
+
+        stats: [RunStats/None] -optional-
+            if given, the wall time of each fold is recorded (see RunStats.add_fold)
+
+        Returns
+        -------
+        parameters (nfolds, DEGREE), covariance matrices (nfolds, DEGREE, DEGREE),
+        chi2 (nfolds)
+        """
+        y, dy  = np.asarray(y, dtype="float"), np.asarray(dy, dtype="float")
+        sqrtw  = 1./dy if weights is None else np.sqrt(weights)/dy
+        design = self.design_matrix * sqrtw[:,None]
+        yw     = y * sqrtw
+        npoints, ndegree = design.shape
+        normal, rhs, yy = np.dot(design.T, design), np.dot(design.T, yw), np.dot(yw, yw)
+        
+        nfolds = len(foldindexes)
+        parameters = np.empty((nfolds, ndegree))
+        covmatrix  = np.empty((nfolds, ndegree, ndegree))
+        chi2       = np.empty(nfolds)
+        for i, indexes in enumerate(foldindexes):
+            if stats is not None:
+                start = time.perf_counter()
+            used = np.zeros(npoints, dtype="bool")
+            used[indexes] = True
+            if 2*np.sum(used) >= npoints:
+                # - downdate: remove the held-out points
+                held = np.flatnonzero(~used)
+                design_, yw_ = design[held], yw[held]
+                normal_ = normal - np.dot(design_.T, design_)
+                rhs_    = rhs    - np.dot(design_.T, yw_)
+                yy_     = yy     - np.dot(yw_, yw_)
+            else:
+                kept = np.flatnonzero(used)
+                design_, yw_ = design[kept], yw[kept]
+                normal_, rhs_, yy_ = np.dot(design_.T, design_), np.dot(design_.T, yw_), np.dot(yw_, yw_)
+                
+            if np.linalg.cond(normal_) < cond_max:
+                parameters[i] = np.linalg.solve(normal_, rhs_)
+                covmatrix[i]  = np.linalg.inv(normal_)
+                chi2[i]       = yy_ - np.dot(parameters[i], rhs_)
+            else:
+                kept = np.flatnonzero(used)
+                parameters[i], covmatrix[i], chi2[i] = \
+                  self.solve_wls(y[kept], dy[kept], indexes=kept,
+                                 weights=None if weights is None else weights[kept])
+            if stats is not None:
+                stats.add_fold(time.perf_counter() - start)
+            
+        return parameters, covmatrix, chi2
+        
+    def get_loglikelihood(self, y, dy, x=None, weights=None):
         """ Measure the likelihood to find the data given the model's parameters.
         Set pdf to True to have the array prior sum of the logs (array not in log=pdf).
+        weights (if any) multiply the log-likelihood of each data point.
 
         In the Fitter define _get_model_args_() that should return the input of this
         """
         res = y - self.get_model(x)
-        return -0.5 * np.sum(res**2/dy**2)
+        return -0.5 * weighted_sum(res**2/dy**2, weights, axis=None)
 
+    def initial_guess(self, y, dy, x=None, weights=None):
+        """ weighted least squares solution (see solve_wls) as guesses
+
+        Returns
+        -------
+        dict (parametername: value)
+        """
+        if x is not None:
+            self.set_xsource(x)
+        return dict(zip(self.freeparameters, self.solve_wls(y, dy, weights=weights)[0]))
+    
     # ----------- #
     #  Prior      #
     # ----------- #
@@ -341,15 +666,37 @@ class PolyModel( BaseModel ):
     
     @use_legendre.setter
     def use_legendre(self, uselegendre):
+        if self._side_properties["legendre"] != bool(uselegendre):
+            self._derived_properties["design_matrix"] = None
         self._side_properties["legendre"] = bool(uselegendre)
 
+    @property
+    def design_matrix(self):
+        """ (N, DEGREE) polynomial basis evaluated at xsource (see get_polynomial_basis).
+        Computed once per xsource """
+        if self._derived_properties["design_matrix"] is None and self.xsource is not None:
+            self._derived_properties["design_matrix"] = \
+              get_polynomial_basis(self.xsource_scaled if self.use_legendre else self.xfit,
+                                   self.DEGREE, legendre=self.use_legendre)
+        return self._derived_properties["design_matrix"]
+    
     # -------------
     # x values
     def set_xsource(self, x):
-        self._properties["xsource_start"],self._properties["xsource_steps"] = self.parse_xdata(np.asarray(x))
-        self._properties["xsource"]        = np.asarray(x)
+        """ set the x values where the model is evaluated.
+        (Nothing is changed if x has the values of the current xsource.
+        A copy of x is stored, so x could be changed in place afterwards) """
+        x = np.asarray(x)
+        if self.xsource is not None and np.shape(x) == np.shape(self.xsource) \
+          and np.array_equal(x, self.xsource):
+            return
+        
+        x = x.copy()
+        self._properties["xsource_start"],self._properties["xsource_steps"] = self.parse_xdata(x)
+        self._properties["xsource"]        = x
         self._derived_properties["nsteps"] = len(self.xsource_steps)
         self._derived_properties["xsource_scaled"] = None
+        self._derived_properties["design_matrix"]  = None
         
     def parse_xdata(self, x):
         """ converts the given array in steps+star format """
@@ -404,29 +751,86 @@ def normal_and_polynomial_model(degree, ngauss):
     -------
     Child of NormPolyModel
     """
-    class N_NormPolyModel( NormPolyModel ):
-        DEGREE = degree
-        NGAUSS = ngauss
-        
-    return N_NormPolyModel()
+    return get_normal_and_polynomial_modelclass(degree, ngauss)()
+
+def get_gaussians_sum(x, mu, sig, ampl, nsigma=None, sortindex=None):
+    """ sum of the gaussians ampl * N(x | mu, sig).
+
+    Parameters
+    ----------
+    x: [array]
+        where the gaussians are evaluated
+
+    mu, sig, ampl: [arrays]
+        centroid, dispersion and amplitude (integral) of the ngauss gaussians.
+        A gaussian with a non-positive sig gives nan.
+
+    nsigma: [float/None] -optional-
+        If given, each gaussian is only evaluated within mu +/- nsigma*sig
+        (0 outside). This needs x sorted (or sortindex).
+        If None, all the gaussians are evaluated on all the x.
+
+    sortindex: [array/None] -optional-
+        if x is not sorted: indexes that sort x (np.argsort(x)).
+        (Used only if nsigma is given)
+
+    Returns
+    -------
+    array (size of x)
+    """
+    x = np.asarray(x, dtype="float")
+    mu, sig, ampl = [np.atleast_1d(np.asarray(v, dtype="float")) for v in [mu, sig, ampl]]
+    if np.any(sig<=0):
+        return np.full(len(x), np.nan)
+    
+    if nsigma is None:
+        return np.sum(ampl[:,None] * np.exp(-0.5*((x-mu[:,None])/sig[:,None])**2) /
+                      (np.sqrt(2*np.pi) * sig[:,None]), axis=0)
+    
+    # - windowed: points within mu +/- nsigma*sig only
+    xsorted = x if sortindex is None else x[sortindex]
+    start   = np.searchsorted(xsorted, mu - nsigma*sig, side="left")
+    counts  = np.searchsorted(xsorted, mu + nsigma*sig, side="right") - start
+    gauss   = np.repeat(np.arange(len(mu)), counts)
+    index   = np.arange(counts.sum()) + np.repeat(start - (np.cumsum(counts) - counts), counts)
+    values  = ampl[gauss] * np.exp(-0.5*((xsorted[index]-mu[gauss])/sig[gauss])**2) / \
+              (np.sqrt(2*np.pi) * sig[gauss])
+    model   = np.bincount(index, weights=values, minlength=len(x))
+    if sortindex is None:
+        return model
+    unsorted = np.empty(len(x))
+    unsorted[sortindex] = model
+    return unsorted
+
+def get_normal_and_polynomial_modelclass(degree, ngauss):
+    """ The NormPolyModel class for the given degree and number of gaussians.
+    The class is created at the first call and cached afterwards.
+    """
+    key = ("NormPolyModel", degree, ngauss)
+    if key not in _MODEL_CLASSES:
+        class N_NormPolyModel( NormPolyModel ):
+            _FACTORY_KEY = key
+            DEGREE = degree
+            NGAUSS = ngauss
+            FREEPARAMETERS = ["a%d"%(i) for i in range(degree)] + \
+                             ["mu%d"%(i) for i in range(ngauss)] + \
+                             ["sig%d"%(i) for i in range(ngauss)] + \
+                             ["ampl%d"%(i) for i in range(ngauss)]
+            
+        _MODEL_CLASSES.setdefault(key, N_NormPolyModel)
+    return _MODEL_CLASSES[key]
 
 
 class NormPolyModel( PolyModel ):
     DEGREE = 0
     NGAUSS = 0
+    FREEPARAMETERS = []
+    LINEAR = False
 
     PROPERTIES = ["normparameters"]
+    SIDE_PROPERTIES    = ["gauss_window"]
+    DERIVED_PROPERTIES = ["xsource_sortindex"]
     
-    def __new__(cls,*arg,**kwarg):
-        """ Black Magic allowing generalization of Polynomial models """
-        if not hasattr(cls,"FREEPARAMETERS"):
-            cls.FREEPARAMETERS = ["a%d"%(i) for i in range(cls.DEGREE)]
-        else:
-            cls.FREEPARAMETERS += ["a%d"%(i) for i in range(cls.DEGREE)]
-        cls.FREEPARAMETERS += ["mu%d"%(i) for i in range(cls.NGAUSS)]  + ["sig%d"%(i) for i in range(cls.NGAUSS)]+ ["ampl%d"%(i) for i in range(cls.NGAUSS)]
-        
-        return super(PolyModel,cls).__new__(cls)
-
     def setup(self, parameters):
         """ read and parse the parameters """
         # good strategy to have 2 names to easily super() the continuum in get_model
@@ -439,8 +843,8 @@ class NormPolyModel( PolyModel ):
         if param is not None:
            self.setup(param)
         cont = 0 if not add_continuum else self._get_continuum_(x)
-        return stats.norm.pdf(x, loc=self.normparameters[ithgauss::self.NGAUSS][0],
-                            scale=self.normparameters[ithgauss::self.NGAUSS][1])*self.normparameters[ithgauss::self.NGAUSS][2] + cont
+        mu, sig, ampl = self.gaussparameters[:,ithgauss]
+        return get_gaussians_sum(x, mu, sig, ampl) + cont
 
     def get_model(self, x=None, param=None):
         """ return the model for the given data.
@@ -458,10 +862,86 @@ class NormPolyModel( PolyModel ):
             self.set_xsource(x)
             
         continuum = self._get_continuum_()
+        if self.gauss_window is None:
+            return continuum + get_gaussians_sum(self.xfit, *self.gaussparameters)
+        
+        return continuum + get_gaussians_sum(self.xfit, *self.gaussparameters,
+                                             nsigma=self.gauss_window,
+                                             sortindex=self.xsource_sortindex)
+
+    def initial_guess(self, y, dy, x=None, weights=None):
+        """ guesses from the data:
+        - the continuum is a weighted least squares polynomial fit (see solve_wls)
+        - the gaussians are the highest peaks of the (running mean) smoothed
+          residuals: mu is the peak location, ampl its height and sig comes
+          from its full width at half maximum.
+        The continuum is then fitted again without the data within mu +/- 3 sig
+        of the gaussians and the amplitudes are updated accordingly.
+
+        Returns
+        -------
+        dict (parametername: value)
+        """
+        if x is not None:
+            self.set_xsource(x)
+        y, dy = np.asarray(y, dtype="float"), np.asarray(dy, dtype="float")
+        weights = np.ones(len(y)) if weights is None else np.asarray(weights, dtype="float")
+        order   = np.arange(len(y)) if self.xsource_sortindex is None else self.xsource_sortindex
+        xsorted = np.asarray(self.xfit, dtype="float")[order]
+        valid   = (weights[order]>0).astype("float")
+        kernel  = np.ones(max(3, len(y)//50))
+        nvalid  = np.convolve(valid, kernel, mode="same")
         
-        return continuum + np.sum([stats.norm.pdf(self.xfit, loc=self.normparameters[i::self.NGAUSS][0],
-                                                scale=self.normparameters[i::self.NGAUSS][1])*self.normparameters[i::self.NGAUSS][2]
-                            for i in range(self.NGAUSS)], axis=0)
+        def get_smoothed_residuals(weights):
+            """ continuum parameters and the smoothed residuals (x-sorted) """
+            continuum_param = self.solve_wls(y, dy, weights=weights)[0]
+            residuals = (y - np.dot(self.design_matrix, continuum_param))[order]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return continuum_param, np.convolve(residuals*valid, kernel, mode="same")/nvalid
+
+        continuum_param, smoothed = get_smoothed_residuals(weights)
+        mask  = (valid>0) & np.isfinite(smoothed)
+        xstep = np.ptp(xsorted)/len(xsorted) if np.ptp(xsorted)>0 else 1.
+        ipeaks, sigs = [], []
+        for i in range(self.NGAUSS):
+            height = np.where(mask, np.abs(smoothed), -np.inf)
+            ipeak  = np.argmax(height) if np.any(mask) else len(xsorted)//2
+            # - half maximum on both sides
+            below  = np.abs(smoothed) < np.abs(smoothed[ipeak])/2
+            left   = np.flatnonzero(below[:ipeak])
+            right  = np.flatnonzero(below[ipeak:])
+            xleft  = xsorted[left[-1]] if len(left)>0 else xsorted[0]
+            xright = xsorted[ipeak+right[0]] if len(right)>0 else xsorted[-1]
+            sig = np.max([(xright - xleft)/(2*np.sqrt(2*np.log(2))), xstep])
+            mask[np.abs(xsorted - xsorted[ipeak]) < 3*sig] = False
+            ipeaks.append(ipeak)
+            sigs.append(sig)
+            
+        # - continuum without the gaussians
+        inwindow = np.zeros(len(y), dtype="bool")
+        inwindow[order] = ~mask & (valid>0)
+        if np.sum(weights>0) - np.sum(inwindow & (weights>0)) >= self.DEGREE:
+            continuum_param, smoothed = get_smoothed_residuals(np.where(inwindow, 0, weights))
+            
+        mus, sigs = xsorted[ipeaks], np.asarray(sigs)
+        ampls = np.nan_to_num(smoothed[ipeaks]) * np.sqrt(2*np.pi) * sigs
+        return dict(zip(self.freeparameters,
+                        np.concatenate([continuum_param, mus, sigs, ampls])))
+
+    def set_gauss_window(self, nsigma=None):
+        """ evaluate each gaussian only within mu +/- nsigma*sig
+        (for long x-arrays with narrow gaussians). None means everywhere.
+        """
+        if nsigma is not None and nsigma <= 0:
+            raise ValueError("nsigma must be positive (or None)")
+        self._side_properties["gauss_window"] = nsigma
+
+    def set_xsource(self, x):
+        """ see PolyModel.set_xsource (the sorting indexes are reset if x changed) """
+        previous = self.xsource
+        super(NormPolyModel, self).set_xsource(x)
+        if self.xsource is not previous:
+            self._derived_properties["xsource_sortindex"] = None
 
     def _get_continuum_(self,x=None):
         """ """
@@ -470,3 +950,22 @@ class NormPolyModel( PolyModel ):
     @property
     def normparameters(self):
         return self._properties["normparameters"]
+
+    @property
+    def gaussparameters(self):
+        """ (3, NGAUSS) array: mu, sig and ampl of the gaussians """
+        return np.reshape(self.normparameters, (3, self.NGAUSS))
+
+    @property
+    def gauss_window(self):
+        """ the gaussians are evaluated within mu +/- gauss_window*sig (everywhere if None)"""
+        return self._side_properties["gauss_window"]
+
+    @property
+    def xsource_sortindex(self):
+        """ indexes sorting xsource (None if xsource is already sorted) """
+        if self._derived_properties["xsource_sortindex"] is None and self.xsource is not None:
+            self._derived_properties["xsource_sortindex"] = \
+              False if np.all(np.diff(self.xfit) >= 0) else np.argsort(self.xfit, kind="stable")
+        sortindex = self._derived_properties["xsource_sortindex"]
+        return None if sortindex is False else sortindex
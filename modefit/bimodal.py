@@ -4,15 +4,15 @@
 """ Module based on virtualfitter to fit bimodal distributions. Does not have to be a step """
 
 import numpy        as np
-from scipy          import stats
+from scipy.special  import log_ndtr, ndtr
 import matplotlib.pyplot as mpl
 import warnings
 # - local dependencies
-from .utils import kwargs_update, is_arraylike
+from .utils import kwargs_update, is_arraylike, get_nworkers, parallel_map, weighted_sum
 from .baseobjects import BaseModel,BaseFitter, DataHandler
 from .unimodal import normal
 
-__all__ = ["stepfit","bimodal_fit"]
+__all__ = ["stepfit","bimodal_fit","stepfit_many","bimodal_fit_many"]
 
 # ========================= #
 #  Main Methods             #
@@ -108,6 +108,430 @@ def stepfit(x,data,errors,proba=None,dx=None,xcut=None,
                    proba=proba,dx=dx,xcut=xcut,
                    **kwargs)
 
+def bimodal_fit_many(data, errors, proba=None, groups=None, masknan=True,
+                     n_jobs=None, executor=None, fitkwargs={},
+                     as_dataframe=False, **kwargs):
+    """ Fit a binormal distribution on many independent datasets.
+    
+    A single fitter is built and reused (on light copies) to fit every group,
+    the groups being potentially distributed over worker processes.
+
+    Parameters
+    -----------
+    data, errors: [list of arrays / arrays]
+        Either lists (one entry per group) of arrays (could be ragged),
+        or flat arrays if `groups` is given.
+
+    proba: [list of arrays / array] -optional-
+        probabilities of the points to be in the first mode (same
+        structure as data). Fitted otherwise (FloatingBinormal).
+
+    groups: [array] -optional-
+        group-id of each data point (flat arrays input).
+
+    masknan: [bool] -optional-
+        Remove the nan values of each group prior to the fit
+
+    n_jobs: [int/None] -optional-
+        number of worker processes. None or 1 means serial.
+
+    executor: [concurrent.futures.Executor] -optional-
+        if given, the groups are distributed using this executor
+        (n_jobs is then ignored).
+
+    fitkwargs: [dict] -optional-
+        goes to the fit() of each group (e.g. 'parametername'_guess)
+
+    as_dataframe: [bool] -optional-
+        return a pandas.DataFrame instead of a numpy structured array.
+
+    **kwargs goes to BimodalFit init (e.g. use_minuit, modelname)
+
+    Returns
+    -------
+    structured array (or DataFrame) with one row per group: group, npoints,
+    the fitted parameters (and their .err), chi2 and fitok.
+    (see _get_fitmany_table_)
+    """
+    groupnames, datasets = _split_groups_(groups, data, errors, proba)
+    if masknan:
+        datasets = [_masknan_(*dataset) for dataset in datasets]
+    kwargs["modelname"] = kwargs.get("modelname", "Binormal" if proba is not None else "FloatingBinormal")
+
+    data0, errors0, proba0 = datasets[0]
+    template = BimodalFit(data0, errors0, proba=proba0, **kwargs)
+    return _fit_many_(template, groupnames, [(d, e, p, None, None, None) for d,e,p in datasets],
+                      fitkwargs=fitkwargs, n_jobs=n_jobs, executor=executor,
+                      as_dataframe=as_dataframe)
+
+def stepfit_many(x, data, errors, xcut, dx=None, groups=None, masknan=True,
+                 n_jobs=None, executor=None, fitkwargs={},
+                 as_dataframe=False, **kwargs):
+    """ Fit a Step in many independent datasets.
+    
+    A single StepFit is built and reused (on light copies) to fit every group,
+    the groups being potentially distributed over worker processes.
+
+    Parameters
+    ----------
+    x, data, errors: [list of arrays / arrays]
+        Either lists (one entry per group) of arrays (could be ragged),
+        or flat arrays if `groups` is given.
+
+    xcut: [float/array]
+        Where the step is located. Either a value common to all the groups
+        or one value per group (in the order of the groups).
+
+    dx: [list of arrays / array] -optional-
+        errors on x (same structure as x).
+
+    groups: [array] -optional-
+        group-id of each data point (flat arrays input).
+        
+    masknan, n_jobs, executor, fitkwargs, as_dataframe:
+        see bimodal_fit_many
+
+    **kwargs goes to StepFit init (e.g. use_minuit, modelname)
+
+    Returns
+    -------
+    structured array (or DataFrame) with one row per group: group, npoints,
+    the fitted parameters (and their .err), chi2, fitok, xcut, step and step.err
+    """
+    groupnames, datasets = _split_groups_(groups, x, data, errors, dx)
+    if masknan:
+        datasets = [_masknan_(*dataset) for dataset in datasets]
+    xcuts = np.broadcast_to(np.asarray(xcut, dtype="float"), len(datasets))
+    
+    x0, data0, errors0, dx0 = datasets[0]
+    template = StepFit(x0, data0, errors0, dx=dx0, xcut=xcuts[0], **kwargs)
+    return _fit_many_(template, groupnames, [(d, e, None, x_, dx_, xcut_)
+                                              for (x_, d, e, dx_), xcut_ in zip(datasets, xcuts)],
+                      fitkwargs=fitkwargs, n_jobs=n_jobs, executor=executor,
+                      as_dataframe=as_dataframe)
+
+# ------------------- #
+#  Many-fit tools     #
+# ------------------- #
+def _split_groups_(groups, *columns):
+    """ returns the group names and the list of the per-group columns
+    (None columns stay None) """
+    if groups is None:
+        ngroups = len(columns[0])
+        return np.arange(ngroups), [tuple(np.asarray(c[i]) if c is not None else None
+                                          for c in columns)
+                                    for i in range(ngroups)]
+    
+    groupnames, inverse = np.unique(groups, return_inverse=True)
+    order  = np.argsort(inverse, kind="stable")
+    bounds = np.cumsum(np.bincount(inverse, minlength=len(groupnames)))[:-1]
+    columns = [np.split(np.asarray(c)[order], bounds) if c is not None else
+               [None]*len(groupnames) for c in columns]
+    return groupnames, list(zip(*columns))
+
+def _masknan_(*columns):
+    """ remove the entries that are nan in any of the given (not None) columns """
+    flagnan = np.any([c != c for c in columns if c is not None], axis=0)
+    return tuple(c[~flagnan] if c is not None else None for c in columns)
+
+def _fit_many_(template, groupnames, datasets, fitkwargs={},
+               n_jobs=None, executor=None, as_dataframe=False):
+    """ fit the datasets [(data, errors, proba, x, dx, xcut), ...] using
+    light copies of the template and returns the table of results """
+    chunks = [chunk for chunk in np.array_split(np.arange(len(datasets)),
+                                                get_nworkers(n_jobs, executor))
+              if len(chunk)>0]
+    template = template._get_worker_copy_()
+    outputs  = parallel_map(_fit_many_worker_,
+                            [(template, [datasets[i] for i in chunk], fitkwargs) for chunk in chunks],
+                            n_jobs=n_jobs, executor=executor)
+    fitvalues = [fitvalue for output in outputs for fitvalue in output]
+    # - most likely not a problem of the data (e.g. wrong fitkwargs)
+    failures  = [fitvalue for fitvalue in fitvalues if isinstance(fitvalue, Exception)]
+    if len(failures) == len(fitvalues):
+        raise failures[-1]
+    fitvalues = [None if isinstance(fitvalue, Exception) else fitvalue for fitvalue in fitvalues]
+
+    table = _get_fitmany_table_(template, groupnames, fitvalues)
+    table["npoints"] = [len(dataset[0]) for dataset in datasets]
+    if as_dataframe:
+        import pandas
+        return pandas.DataFrame(table)
+    return table
+
+def _get_fitmany_table_(template, groupnames, fitvalues):
+    """ build the structured array gathering the fitvalues (None for failed fits) """
+    names = ["chi2"]
+    for name in template.model.freeparameters:
+        names += [name, name+".err"]
+    if isinstance(template, StepFit):
+        names += ["xcut", "step", "step.err"]
+        
+    table = np.zeros(len(groupnames), dtype=[("group", np.asarray(groupnames).dtype),
+                                             ("npoints","int"), ("fitok","bool")] +\
+                                            [(name, "float") for name in names])
+    table["group"] = groupnames
+    for i, fitvalue in enumerate(fitvalues):
+        table["fitok"][i] = fitvalue is not None and fitvalue["fitok"]
+        for name in names:
+            table[name][i] = fitvalue[name] if fitvalue is not None else np.nan
+    return table
+
+def _fit_many_worker_(fitter, datasets, fitkwargs={}):
+    """ fit the datasets (see _fit_many_) with the given fitter.
+    Returns the list of fitvalues (the exception if the fit failed) """
+    fitvalues = []
+    for data, errors, proba, x, dx, xcut in datasets:
+        try:
+            if x is not None:
+                fitter.set_x(x, dx=dx, xcut=xcut)
+                proba = fitter.get_proba()
+            fitter.set_data(data, errors, proba)
+            fitter.fit(**fitkwargs)
+        except (ValueError, FloatingPointError, np.linalg.LinAlgError) as e:
+            # - only the failures of the fit itself, not the programming errors
+            warnings.warn("fit failed (%s) => NaN returned"%e)
+            fitvalues.append(e)
+            continue
+        
+        fitvalue = fitter.get_fitvalues()
+        fitvalue["fitok"] = fitter.fitOk
+        if x is not None:
+            fitvalue["xcut"] = xcut
+            fitvalue["step"], fitvalue["step.err"] = fitter.modelstep
+        fitvalues.append(fitvalue)
+    return fitvalues
+
+
+# ========================= #
+#  Log-Density Kernels      #
+# ========================= #
+_LOG_SQRT_2PI = 0.5*np.log(2*np.pi)
+
+def normal_logpdf(x, loc, var):
+    """ log of the normal probability density function.
+    (Same as stats.norm.logpdf(x, loc=loc, scale=np.sqrt(var)) without
+    the scipy distribution overhead)
+
+    Parameters
+    ----------
+    x: [array]
+        where the density is evaluated
+
+    loc, var: [float/array]
+        mean and *variance* of the normal distribution.
+
+    Returns
+    -------
+    array
+    """
+    return -0.5*((x-loc)**2/var + np.log(var)) - _LOG_SQRT_2PI
+
+def normal_logcdf(x, loc, var):
+    """ log of the normal cumulative density function.
+    (Same as stats.norm.logcdf(x, loc=loc, scale=np.sqrt(var)))
+    """
+    return log_ndtr((x-loc)/np.sqrt(var))
+
+def binormal_logpdf(x, dx, mean_a, sigma_a, mean_b, sigma_b, logp_a, logp_b):
+    """ log of the density of the mixture of two normal distributions
+    (with intrinsic dispersions sigma_a and sigma_b) given the data errors dx:
+    log( p_a * N(x | mean_a, sigma_a**2+dx**2) + p_b * N(x | mean_b, sigma_b**2+dx**2) )
+
+    The components are combined with np.logaddexp, so the result is accurate
+    even when both densities underflow.
+
+    Parameters
+    ----------
+    x, dx: [array, array]
+        data and their errors
+
+    mean_a, sigma_a, mean_b, sigma_b: [floats]
+        parameters of the 2 normal distributions
+
+    logp_a, logp_b: [float/array]
+        log of the weights of each component (e.g. log(p) and log(1-p))
+
+    Returns
+    -------
+    array
+    """
+    dx2 = dx**2
+    return np.logaddexp(logp_a + normal_logpdf(x, mean_a, sigma_a**2 + dx2),
+                        logp_b + normal_logpdf(x, mean_b, sigma_b**2 + dx2))
+
+def binormal_logcdf(x, dx, mean_a, sigma_a, mean_b, sigma_b, logp_a, logp_b):
+    """ log of the cumulative density of the mixture of two normal distributions.
+    See binormal_logpdf """
+    dx2 = dx**2
+    return np.logaddexp(logp_a + normal_logcdf(x, mean_a, sigma_a**2 + dx2),
+                        logp_b + normal_logcdf(x, mean_b, sigma_b**2 + dx2))
+
+def binormal_logpdf_gradient(x, dx, mean_a, sigma_a, mean_b, sigma_b, logp_a, logp_b):
+    """ gradient of binormal_logpdf with respect to mean_a, sigma_a, mean_b and sigma_b
+    (see binormal_logpdf for the parameters)
+
+    Returns
+    -------
+    (4,N) array, [lognorm_a, lognorm_b, logpdf]
+    where lognorm_a and lognorm_b are the log of the (unweighted) normal densities
+    and logpdf is binormal_logpdf.
+    """
+    dx2 = dx**2
+    var_a, var_b = sigma_a**2 + dx2, sigma_b**2 + dx2
+    lognorm_a, lognorm_b = normal_logpdf(x, mean_a, var_a), normal_logpdf(x, mean_b, var_b)
+    logpdf = np.logaddexp(logp_a + lognorm_a, logp_b + lognorm_b)
+    # - responsibilities
+    r_a, r_b = np.exp(logp_a + lognorm_a - logpdf), np.exp(logp_b + lognorm_b - logpdf)
+    res_a, res_b = x - mean_a, x - mean_b
+    grad = np.asarray([r_a * res_a / var_a,
+                       r_a * sigma_a * (res_a**2/var_a - 1) / var_a,
+                       r_b * res_b / var_b,
+                       r_b * sigma_b * (res_b**2/var_b - 1) / var_b])
+    return grad, [lognorm_a, lognorm_b, logpdf]
+
+def get_logweights(p):
+    """ returns log(p), log(1-p) (no warning for p=0 or 1)"""
+    p = np.asarray(p, dtype="float")
+    with np.errstate(divide="ignore"):
+        return np.log(p), np.log1p(-p)
+
+def get_step_proba(x, xcut, dx=None):
+    """ probability for the points to be below the given xcut
+    (i.e. P(x_true <= xcut) assuming gaussian errors dx on x).
+
+    Parameters
+    ----------
+    x: [array]
+        x-values of the N points
+
+    xcut: [float/array]
+        location(s) of the step. If an array of ncut values is given,
+        the (ncut, N) matrix of probabilities is returned.
+
+    dx: [array/None] -optional-
+        errors on x. If None (or for dx=0 points), the probability is
+        1 below xcut (included) and 0 above.
+
+    Returns
+    -------
+    array (N) or (ncut, N)
+    """
+    x     = np.asarray(x, dtype="float")
+    xcut_ = np.asarray(xcut, dtype="float")
+    diff  = xcut_[...,None] - x if xcut_.ndim else xcut_ - x
+    step  = (diff >= 0).astype("float")
+    if dx is None:
+        return step
+    
+    dx = np.asarray(dx, dtype="float")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(dx>0, ndtr(diff/dx), step)
+
+def binormal_em(x, dx, p=None, weights=None, niter=10, tol=1e-8, guess=None):
+    """ Expectation-Maximization of the mixture of two normal distributions
+    given the data errors dx (heteroscedastic, 'extreme deconvolution' update):
+    each point i is drawn from N(mean_k, sigma_k**2 + dx_i**2).
+
+    Each iteration is fully vectorized over the data points.
+
+    Parameters
+    ----------
+    x, dx: [array, array]
+        data and their errors
+
+    p: [array/None] -optional-
+        probability of each point to belong to the first (a) component.
+        If None, the weight of the a component (proba_a) is fitted too.
+
+    weights: [array/None] -optional-
+        weight of each data point (e.g. bootstrap weights)
+
+    niter: [int/None] -optional-
+        maximum number of iterations. If None, this iterates until
+        convergence (max 10000 iterations).
+
+    tol: [float] -optional-
+        the iterations stop once the log-likelihood improves by less than tol.
+
+    guess: [list/None] -optional-
+        initial mean_a, sigma_a, mean_b, sigma_b (and proba_a).
+        If None, the points are split in two according to p (or to the median of x).
+
+    Returns
+    -------
+    array [mean_a, sigma_a, mean_b, sigma_b, proba_a], float (loglikelihood)
+    (if p is given, proba_a is the (weighted) fraction of points attributed to
+    the a component. If p is None, the components are ordered such that mean_a <= mean_b)
+    """
+    x   = np.asarray(x, dtype="float")
+    dx2 = np.broadcast_to(np.asarray(dx, dtype="float")**2, x.shape)
+    w   = np.ones(x.shape) if weights is None else np.asarray(weights, dtype="float")
+    floating = p is None
+    if niter is None:
+        niter = 10000
+    # variance floor to avoid singular components for error-free points
+    var_floor = 1e-12*np.var(x) + 1e-300
+
+    def mstep(resp, means, variances):
+        """ extreme-deconvolution update. resp is (2,N) """
+        wresp = w*resp
+        norm  = wresp.sum(axis=1)
+        if np.any(norm<=0):
+            raise ValueError("one of the component has no data point left.")
+        # - expectation of the true values and of their variances
+        gain  = variances[:,None] / (variances[:,None] + dx2)
+        b     = means[:,None] + gain*(x - means[:,None])
+        means_ = np.sum(wresp*b, axis=1) / norm
+        variances_ = np.sum(wresp*((b - means_[:,None])**2 + variances[:,None]*(1-gain)),
+                            axis=1) / norm
+        return means_, np.maximum(variances_, var_floor), norm/w.sum()
+
+    # -------------- #
+    # Initialization #
+    # -------------- #
+    if guess is not None:
+        means     = np.asarray([guess[0], guess[2]], dtype="float")
+        variances = np.maximum(np.asarray([guess[1], guess[3]], dtype="float")**2, var_floor)
+        proba_a   = guess[4] if floating and len(guess)>4 else 0.5
+    else:
+        p_a  = (x<=np.median(x)).astype("float") if floating else np.asarray(p, dtype="float")
+        resp = np.asarray([p_a, 1-p_a])
+        # moments of each initial group, no deconvolution: sigma**2 = var(x) - <dx**2>
+        wresp = w*resp
+        norm  = wresp.sum(axis=1)
+        if np.any(norm<=0):
+            raise ValueError("one of the component has no data point.")
+        means = np.sum(wresp*x, axis=1)/norm
+        variances = np.maximum(np.sum(wresp*((x-means[:,None])**2 - dx2), axis=1)/norm,
+                               np.var(x)*1e-2 + var_floor)
+        proba_a = norm[0]/w.sum()
+
+    def estep(means, variances, proba_a):
+        """ responsibility of the a component and total log-likelihood """
+        logp_a, logp_b = get_logweights(proba_a if floating else p)
+        lognorm_a = logp_a + normal_logpdf(x, means[0], variances[0] + dx2)
+        lognorm_b = logp_b + normal_logpdf(x, means[1], variances[1] + dx2)
+        logpdf    = np.logaddexp(lognorm_a, lognorm_b)
+        return np.exp(lognorm_a - logpdf), np.sum(w*logpdf)
+
+    # ---------- #
+    # Iterations #
+    # ---------- #
+    resp_a, loglikelihood = estep(means, variances, proba_a)
+    for i in range(niter):
+        means, variances, (proba_a, _) = mstep(np.asarray([resp_a, 1-resp_a]), means, variances)
+        resp_a, loglikelihood_ = estep(means, variances, proba_a)
+        converged = loglikelihood_ - loglikelihood < tol
+        loglikelihood = loglikelihood_
+        if converged:
+            break
+
+    sigmas = np.sqrt(variances)
+    if floating and means[0] > means[1]:
+        return np.asarray([means[1], sigmas[1], means[0], sigmas[0], 1-proba_a]), loglikelihood
+
+    return np.asarray([means[0], sigmas[0], means[1], sigmas[1], proba_a]), loglikelihood
 
 # ========================== #
 #                            #
@@ -222,15 +646,93 @@ class BimodalFit( BaseFitter, DataHandler ):
         self._properties["proba"] = np.asarray(proba) if proba is not None else proba
 
         self._side_properties["names"] = np.asarray(names) if names is not None else None
+        self._reset_used_data_()
+        self._reset_model_logproba_()
+
+    def set_proba(self, proba):
+        """ change the probability of the data to belong to the first mode,
+        without changing the data (see set_data).
+
+        Parameters
+        ----------
+        proba: [array]
+            Probability of the data to belong to one mode or the other.
+            The probabilies must be float between 0 and 1
+        
+        Returns
+        -------
+        Void
+        """
+        proba = np.asarray(proba)
+        if (proba>1).any() or (proba<0).any():
+            raise ValueError("probabilities (proba) must be between 0 and 1")
+        if len(proba) != self.npoints:
+            raise ValueError("proba must have the same size as data (%d vs. %d)"%(len(proba),self.npoints))
         
+        self._properties["proba"] = proba
+        self._reset_used_data_()
+        self._reset_model_logproba_()
+
+    def _reset_model_logproba_(self):
+        """ the model's cached log-weights are not valid anymore (see set_proba) """
+        if self.is_model_set() and hasattr(self.model, "reset_logproba"):
+            self.model.reset_logproba()
         
     # ========================= #
     # = Fit                   = #  
     # ========================= #        
+    def fit(self, use_minuit=None, kfold=None, nsamples=1000,
+            init=None, em_niter=10, em_tol=1e-8, **kwargs):
+        """ fit the data following the model.
+
+        Parameters
+        ----------
+        use_minuit, kfold, nsamples:
+            see BaseFitter.fit
+
+        init: [None/string] -optional-
+            how the initial guesses are set.
+            - None: the model's default guesses (or the given 'parametername'_guess)
+            - 'em': the guesses come from a few Expectation-Maximization iterations
+              accounting for the data errors (see get_em_guesses).
+              Guesses given as kwargs are kept.
+
+        em_niter, em_tol: [int/None, float] -optional-
+            maximum number of EM iterations and log-likelihood tolerance.
+            If em_niter is None, EM runs up to convergence and the minimizer
+            then mostly provides the errors.
+
+        **kwargs goes to BaseFitter.fit (e.g. 'parametername'_guess)
+
+        Returns
+        -------
+        Void
+        """
+        if init is not None:
+            if init != "em":
+                raise ValueError("Unknown init '%s'. Only 'em' (or None) is available"%init)
+            kwargs = kwargs_update(self.get_em_guesses(niter=em_niter, tol=em_tol), **kwargs)
+
+        return super(BimodalFit, self).fit(use_minuit=use_minuit, kfold=kfold,
+                                           nsamples=nsamples, **kwargs)
+
+    def get_em_guesses(self, niter=10, tol=1e-8):
+        """ Expectation-Maximization estimation of the model parameters
+        (based on the model's run_em method) using all the data.
+
+        Returns
+        -------
+        dict ('parametername'_guess: value)
+        """
+        self.set_used_indexes(None)
+        parameters = self.model.run_em(*self._get_model_args_(), niter=niter, tol=tol,
+                                       **self._get_model_kwargs_())
+        return {"%s_guess"%k: v for k,v in zip(self.model.freeparameters, parameters)}
+
     def _get_model_args_(self):
         if ModelFloatingBinormal in self.model.__class__.__mro__:
-            return self.data[self.used_indexes],self.errors[self.used_indexes]
-        return self.data[self.used_indexes],self.errors[self.used_indexes],self.proba[self.used_indexes]
+            return self._get_used_data_("data","errors")
+        return self._get_used_data_("data","errors","proba")
         
     # ====================== #
     # Properties             #
@@ -257,6 +759,42 @@ class BimodalFit( BaseFitter, DataHandler ):
         if runfit:
             self.unimodal.fit()
             
+def _scan_xcut_worker_(fitter, probas, warm_start=True, fitkwargs={}, proba_previous=None):
+    """ fits the given fitter for each proba of probas (see StepFit.scan_xcut).
+
+    Each proba is fitted from the fitter's initial guesses (cold start). If
+    warm_start, it is also fitted starting from the cold-start solution of the
+    previous proba (proba_previous for the first one) and the best of the two
+    fits is kept. Parameters that converged on their boundaries are not
+    carried over. The output thus does not depend on how probas are chunked.
+
+    Returns a (nprobas, 3) array: step, step_err, chi2 """
+    param_input  = fitter.param_input.copy()
+    auto_guesses = fitter.auto_guesses
+    
+    def _fit_cold_(proba):
+        fitter._properties["param_input"]       = param_input.copy()
+        fitter._side_properties["auto_guesses"] = auto_guesses
+        fitter.set_proba(proba)
+        fitter.fit(**fitkwargs)
+        if not warm_start:
+            return None
+        return kwargs_update(fitkwargs, **{"%s_guess"%k: fitter.fitvalues[k]
+                                           for k in fitter.model.freeparameters
+                                           if not fitter.converged_on_boundaries([k])})
+    
+    output  = np.empty((len(probas), 3))
+    guesses = None if proba_previous is None else _fit_cold_(proba_previous)
+    for i, proba in enumerate(probas):
+        guesses_next = _fit_cold_(proba)
+        output[i] = list(fitter.modelstep) + [fitter.get_fval()]
+        if guesses is not None:
+            fitter.fit(**guesses)
+            if fitter.get_fval() < output[i][2]:
+                output[i] = list(fitter.modelstep) + [fitter.get_fval()]
+        guesses = guesses_next
+    return output
+    
 # ========================== #
 #                            #
 #     The Model              #
@@ -265,10 +803,12 @@ class BimodalFit( BaseFitter, DataHandler ):
 class ModelBinormal( BaseModel ):
     """ Model for a Bi Normal Distribution (2 Gaussians) """
 
-    SIDE_PROPERTIES = []
+    SIDE_PROPERTIES    = []
+    DERIVED_PROPERTIES = ["logproba"]
     
     FREEPARAMETERS = ["mean_a","sigma_a",
                       "mean_b","sigma_b"]
+    VECTORIZED = True
     # -------------------
     # - Initial Guesses    
     sigma_a_guess = 0
@@ -286,22 +826,77 @@ class ModelBinormal( BaseModel ):
     # ----------------------- #
     # - LikeLiHood and Chi2 - #
     # ----------------------- #
-    def get_loglikelihood(self,x,dx,p):
-        """ Measure the likelihood to find the data given the model's parameters """
-        return np.sum(np.log( self.pdf(x,dx,p) ))
+    def get_loglikelihood(self,x,dx,p, weights=None):
+        """ Measure the likelihood to find the data given the model's parameters.
+        weights (if any) multiply the log-likelihood of each data point """
+        return weighted_sum(self.logpdf(x,dx,p), weights)
+
+    def get_loglikelihood_gradient(self, x, dx, p, weights=None):
+        """ gradient of get_loglikelihood with respect to the FREEPARAMETERS """
+        grad, _ = binormal_logpdf_gradient(x, dx, self.mean_a, self.sigma_a,
+                                           self.mean_b, self.sigma_b,
+                                           *self.get_logproba(p))
+        return weighted_sum(grad, weights)
+    
+    def run_em(self, x, dx, p, weights=None, niter=10, tol=1e-8):
+        """ Expectation-Maximization estimate of the parameters
+        accounting for the data errors (see binormal_em).
+        This is fast and could be used as initial guesses of the fit.
+
+        Returns
+        -------
+        array (parameters in the FREEPARAMETERS order)
+        """
+        return binormal_em(x, dx, p=p, weights=weights, niter=niter, tol=tol)[0][:4]
+
+    def initial_guess(self, *args, **kwargs):
+        """ moments of the two groups of points (deconvolved from the data errors)
+        as defined at the start of the Expectation-Maximization (see run_em).
+        args and kwargs are those of get_loglikelihood.
+
+        Returns
+        -------
+        dict (parametername: value), empty if one of the group has no data point.
+        """
+        try:
+            return dict(zip(self.freeparameters, self.run_em(*args, niter=0, **kwargs)))
+        except ValueError:
+            return {}
+    
+    def get_logproba(self, p):
+        """ log(p) and log(1-p). These are computed only once as long as `p`
+        has the same values (a copy is kept to compare, see reset_logproba) """
+        cached = self._derived_properties["logproba"]
+        if cached is None or np.shape(cached[0]) != np.shape(p) or \
+          not np.array_equal(cached[0], p):
+            cached = (np.array(p, dtype="float"),) + get_logweights(p)
+            self._derived_properties["logproba"] = cached
+        return cached[1], cached[2]
+
+    def reset_logproba(self):
+        """ forget the cached log(p) and log(1-p) (see get_logproba) """
+        self._derived_properties["logproba"] = None
 
     # ------------- #
     # - Modeling  - #
     # ------------- #
     def cdf(self, x, dx, p):
         """ """
-        return p * stats.norm.cdf(x,loc=self.mean_a,scale=np.sqrt(self.sigma_a**2 + dx**2)) + \
-               (1-p) * stats.norm.cdf(x,loc=self.mean_b,scale=np.sqrt(self.sigma_b**2 + dx**2))
+        return np.exp(self.logcdf(x, dx, p))
                
     def pdf(self, x, dx, p):
+        """ return the likelihood of the given case. See get_loglikelihood """
+        return np.exp(self.logpdf(x, dx, p))
+
+    def logcdf(self, x, dx, p):
+        """ log of the cumulative density. See cdf """
+        return binormal_logcdf(x, dx, self.mean_a, self.sigma_a, self.mean_b, self.sigma_b,
+                               *self.get_logproba(p))
+    
+    def logpdf(self, x, dx, p):
         """ return the log likelihood of the given case. See get_loglikelihood """
-        return p * stats.norm.pdf(x,loc=self.mean_a,scale=np.sqrt(self.sigma_a**2 + dx**2)) + \
-               (1-p) * stats.norm.pdf(x,loc=self.mean_b,scale=np.sqrt(self.sigma_b**2 + dx**2))
+        return binormal_logpdf(x, dx, self.mean_a, self.sigma_a, self.mean_b, self.sigma_b,
+                               *self.get_logproba(p))
 
     def get_chauvenet_mask(self, x, dx, p, outlier_cut=0.5):
         """
@@ -328,11 +923,10 @@ class ModelBinormal( BaseModel ):
     # - Bayesian methods    - #
     # ----------------------- #
     def lnprior(self,parameter):
-        """ so far a flat prior """
-        for name_param,p in zip(self.FREEPARAMETERS, parameter):
-            if "sigma" in name_param and p<0:
-                return -np.inf
-        return 0
+        """ so far a flat prior (sigmas must be positive).
+        parameter could be a (nwalkers, nparam) array """
+        sigmas = np.asarray(parameter)[...,["sigma" in name for name in self.FREEPARAMETERS]]
+        return np.where(np.any(sigmas<0, axis=-1), -np.inf, 0.)
 
     
     # ================== #
@@ -357,25 +951,63 @@ class ModelFloatingBinormal( ModelBinormal ):
         """ """
         self.mean_a,self.sigma_a,self.mean_b,self.sigma_b, self.proba_a = parameters
 
+    def lnprior(self,parameter):
+        """ flat prior (sigmas must be positive and proba_a between 0 and 1).
+        parameter could be a (nwalkers, nparam) array """
+        proba_a = np.asarray(parameter)[...,self.FREEPARAMETERS.index("proba_a")]
+        return np.where((proba_a<0) | (proba_a>1), -np.inf,
+                        super(ModelFloatingBinormal, self).lnprior(parameter))
+
     # ----------------------- #
     # - LikeLiHood and Chi2 - #
     # ----------------------- #
-    def get_loglikelihood(self,x,dx):
-        """ Measure the likelihood to find the data given the model's parameters """
-        return np.sum(np.log( self.pdf(x,dx) ))
+    def get_loglikelihood(self,x,dx, weights=None):
+        """ Measure the likelihood to find the data given the model's parameters.
+        weights (if any) multiply the log-likelihood of each data point """
+        return weighted_sum(self.logpdf(x,dx), weights)
+
+    def run_em(self, x, dx, weights=None, niter=10, tol=1e-8):
+        """ Expectation-Maximization estimate of the parameters
+        accounting for the data errors (see binormal_em).
+        The `a` component is the one with the lowest mean.
+
+        Returns
+        -------
+        array (parameters in the FREEPARAMETERS order)
+        """
+        parameters = binormal_em(x, dx, weights=weights, niter=niter, tol=tol)[0]
+        parameters[-1] = np.clip(parameters[-1], *self.proba_a_boundaries)
+        return parameters
+
+    def get_loglikelihood_gradient(self, x, dx, weights=None):
+        """ gradient of get_loglikelihood with respect to the FREEPARAMETERS """
+        grad, (lognorm_a, lognorm_b, logpdf) = \
+          binormal_logpdf_gradient(x, dx, self.mean_a, self.sigma_a,
+                                   self.mean_b, self.sigma_b,
+                                   *get_logweights(self.proba_a))
+        grad_proba = np.exp(lognorm_a - logpdf) - np.exp(lognorm_b - logpdf)
+        return weighted_sum(np.concatenate([grad, [grad_proba]], axis=0), weights)
 
     # ------------- #
     # - Modeling  - #
     # ------------- #
     def cdf(self, x, dx):
         """ """
-        return self.proba_a * stats.norm.cdf(x,loc=self.mean_a,scale=np.sqrt(self.sigma_a**2 + dx**2)) + \
-               (1-self.proba_a) * stats.norm.cdf(x,loc=self.mean_b,scale=np.sqrt(self.sigma_b**2 + dx**2))
+        return np.exp(self.logcdf(x, dx))
                
     def pdf(self,x, dx):
+        """ return the likelihood of the given case. See get_loglikelihood """
+        return np.exp(self.logpdf(x, dx))
+
+    def logcdf(self, x, dx):
+        """ log of the cumulative density. See cdf """
+        return binormal_logcdf(x, dx, self.mean_a, self.sigma_a, self.mean_b, self.sigma_b,
+                               *get_logweights(self.proba_a))
+    
+    def logpdf(self, x, dx):
         """ return the log likelihood of the given case. See get_loglikelihood """
-        return self.proba_a * stats.norm.pdf(x,loc=self.mean_a,scale=np.sqrt(self.sigma_a**2 + dx**2)) + \
-               (1-self.proba_a) * stats.norm.pdf(x,loc=self.mean_b,scale=np.sqrt(self.sigma_b**2 + dx**2))
+        return binormal_logpdf(x, dx, self.mean_a, self.sigma_a, self.mean_b, self.sigma_b,
+                               *get_logweights(self.proba_a))
 
     def get_chauvenet_mask(self, x, dx, outlier_cut=0.5):
         """
@@ -398,14 +1030,6 @@ class ModelFloatingBinormal( ModelBinormal ):
         outlier_cut = outlier_cut/(2.*len(x))
         return (cdf<outlier_cut) + (cdf>(1-outlier_cut))
 
-    def _minuit_chi2_(self,mean_a,sigma_a,
-                     mean_b,sigma_b, proba_a):
-        """
-        """
-        # USELESS I THINK
-        parameter = mean_a,sigma_a,mean_b,sigma_b, proba_a
-        return self.get_chi2(parameter)
-
 
 class ModelAssymBinormal( ModelBinormal ):
     """ """
@@ -418,14 +1042,52 @@ class ModelAssymBinormal( ModelBinormal ):
     def setup(self, parameters):
         """ """
         self.mean_a, self.sigma_a, self.mean_b, self.sigma_b, self.relat_ampl = parameters
+
+    def lnprior(self,parameter):
+        """ flat prior (sigmas must be positive and relat_ampl between 0 and 1).
+        parameter could be a (nwalkers, nparam) array """
+        relat_ampl = np.asarray(parameter)[...,self.FREEPARAMETERS.index("relat_ampl")]
+        return np.where((relat_ampl<0) | (relat_ampl>1), -np.inf,
+                        super(ModelAssymBinormal, self).lnprior(parameter))
     
-    def pdf(self, x, dx, p):
+    def run_em(self, x, dx, p, weights=None, niter=10, tol=1e-8):
+        """ Expectation-Maximization estimate of mean_a, sigma_a, mean_b and sigma_b
+        ignoring the asymmetry (see ModelBinormal.run_em).
+        relat_ampl is set to relat_ampl_guess.
+
+        Returns
+        -------
+        array (parameters in the FREEPARAMETERS order)
+        """
+        return np.append(super(ModelAssymBinormal, self).run_em(x, dx, p, weights=weights,
+                                                                 niter=niter, tol=tol),
+                         self.relat_ampl_guess)
+
+    def get_logweights(self, p):
+        """ log of the weights of the a and b normal distributions:
+        p + (1-p)*relat_ampl and (1-p)*(1-relat_ampl) """
+        logp, log1mp = self.get_logproba(p)
+        logr, log1mr = get_logweights(self.relat_ampl)
+        return np.logaddexp(logp, log1mp + logr), log1mp + log1mr
+
+    def get_loglikelihood_gradient(self, x, dx, p, weights=None):
+        """ gradient of get_loglikelihood with respect to the FREEPARAMETERS """
+        grad, (lognorm_a, lognorm_b, logpdf) = \
+          binormal_logpdf_gradient(x, dx, self.mean_a, self.sigma_a,
+                                   self.mean_b, self.sigma_b,
+                                   *self.get_logweights(p))
+        grad_ampl = (1-p) * (np.exp(lognorm_a - logpdf) - np.exp(lognorm_b - logpdf))
+        return weighted_sum(np.concatenate([grad, [grad_ampl]], axis=0), weights)
+    
+    def logcdf(self, x, dx, p):
+        """ log of the cumulative density. See cdf """
+        return binormal_logcdf(x, dx, self.mean_a, self.sigma_a, self.mean_b, self.sigma_b,
+                               *self.get_logweights(p))
+    
+    def logpdf(self, x, dx, p):
         """ return the log likelihood of the given case. See get_loglikelihood """
-        
-        return p * stats.norm.pdf(x,loc=self.mean_a,scale=np.sqrt(self.sigma_a**2 + dx**2)) + \
-               (1-p) * \
-        (self.relat_ampl * stats.norm.pdf(x,loc=self.mean_a,scale=np.sqrt(self.sigma_a**2 + dx**2))+
-         (1-self.relat_ampl) * stats.norm.pdf(x,loc=self.mean_b,scale=np.sqrt(self.sigma_b**2 + dx**2)))
+        return binormal_logpdf(x, dx, self.mean_a, self.sigma_a, self.mean_b, self.sigma_b,
+                               *self.get_logweights(p))
 
 # ========================== #
 #                            #
@@ -498,9 +1160,7 @@ class StepFit( BimodalFit ):
         # -- The x Information -- #
         # ----------------------- #
         # -- basic x-stuffs
-        self._properties["x"]       = np.asarray(x)
-        self._side_properties["dx"] = dx if dx is None else np.asarray(dx)
-        self._properties["xcut"]    = xcut
+        self.set_x(x, dx=dx, xcut=xcut)
         # -- The Probability given the step location
         if proba is None:
             if xcut is None:
@@ -517,6 +1177,32 @@ class StepFit( BimodalFit ):
     # ========================= #
     # = Step Stuffs           = #  
     # ========================= #
+    def set_x(self, x, dx=None, xcut=None):
+        """ set the x-axis information (x, dx and xcut) used to define proba.
+        This does not update proba (see get_proba and set_proba)
+
+        Parameters
+        ----------
+        x: [float-array]
+            The x-axis where the cut is made between the 2 populations.
+
+        dx: [float-array or None] - optional -
+            errors on the xaxis.
+
+        xcut: [float or None] - optional -
+            This is were the split is between the 2 populations.
+
+        Returns
+        -------
+        Void
+        """
+        if dx is not None and len(x) != len(dx):
+            raise ValueError("x and dx must have the sample size (%d vs. %d). Give dx=None not to use it"%(len(x),len(dx)))
+        
+        self._properties["x"]       = np.asarray(x)
+        self._side_properties["dx"] = dx if dx is None else np.asarray(dx)
+        self._properties["xcut"]    = xcut
+        
     def get_proba(self,xcut=None):
         """
          This function will split the sample in two at the given *xcut* value.
@@ -527,22 +1213,89 @@ class StepFit( BimodalFit ):
         Parameters:
         -----------
 
-        xcut: [float/None]         The x-value where the sample is splitted in 2.
+        xcut: [float/array/None]   The x-value where the sample is splitted in 2.
                                    If None is set, self.xcut will be used if it
                                    already is defined. This will update self.xcut.
+                                   If an array of ncut values is given, self.xcut
+                                   is not updated and a (ncut, N) matrix is returned.
 
         Returns:
         --------
-        array of float (between 0 and 1 ;size of x)
+        array of float (between 0 and 1 ;size of x) (see get_step_proba)
         """
-        if xcut is not None:
-            self._side_properties['xcut'] = xcut
+        if xcut is None:
+            xcut = self.xcut
+        elif np.ndim(xcut) == 0:
+            self._properties['xcut'] = xcut
+            
+        return get_step_proba(self.x, xcut, self.dx)
+
+    def scan_xcut(self, xcuts, n_jobs=None, executor=None, warm_start=True, **kwargs):
+        """ fit the step for several xcut values.
+
+        The (ncut, N) probability matrix is computed once. Each xcut is
+        fitted from the initial guesses and, if warm_start, also from the
+        solution of the previous (closest lower) xcut, keeping the best fit.
+        This instance is not changed (fits are made on light copies). The
+        reference unimodal fit is that of self.unimodal if it has been fitted,
+        otherwise it is made on a copy.
+
+        Parameters
+        ----------
+        xcuts: [array]
+            the xcut values to test.
+
+        n_jobs: [int/None] -optional-
+            number of worker processes. The xcuts are split in n_jobs
+            contiguous chunks (the result does not depend on n_jobs).
+
+        executor: [concurrent.futures.Executor] -optional-
+            if given, the chunks are distributed using this executor
+            (n_jobs is then ignored).
+
+        warm_start: [bool] -optional-
+            Should the fitted values of a xcut also be tried as the guesses of
+            the next one? (values on their boundaries are not carried over)
+
+        **kwargs goes to fit() (e.g. 'parametername'_guess) for every xcut
+
+        Returns
+        -------
+        structured array with the fields: xcut, step, step_err, chi2
+        (-2 log likelihood) and delta_chi2 (unimodal chi2 - chi2).
+        """
+        if ModelFloatingBinormal in self.model.__class__.__mro__:
+            raise ValueError("the model does not use proba (FloatingBinormal), no xcut to scan")
         
-        if self.dx is None: # - faster this way
-            return np.asarray([0 if x>self.xcut else 1 for x in self.x])
+        xcuts  = np.atleast_1d(np.asarray(xcuts, dtype="float"))
+        order  = np.argsort(xcuts)
+        probas = self.get_proba(xcuts[order])
+        
+        fitter = self._get_worker_copy_()
+        # -- the reference
+        if self.unimodal is None or not self.unimodal.has_fit_run():
+            fitter.set_unimodal(runfit=True)
+            unimodal_chi2 = fitter.unimodal.get_fval()
+        else:
+            unimodal_chi2 = self.unimodal.get_fval()
+            
+        # -- the scan
+        fitter._side_properties["unimodal"] = None
+        chunks = [chunk for chunk in np.array_split(np.arange(len(xcuts)),
+                                                    get_nworkers(n_jobs, executor))
+                  if len(chunk)>0]
+        outputs = parallel_map(_scan_xcut_worker_,
+                               [(fitter, probas[chunk], warm_start, kwargs,
+                                 probas[chunk[0]-1] if chunk[0]>0 else None)
+                                for chunk in chunks],
+                               n_jobs=n_jobs, executor=executor)
         
-        return np.asarray([stats.norm(loc=x,scale=dx).cdf(self.xcut)
-                         for x,dx in zip(self.x,self.dx)])
+        scan = np.zeros(len(xcuts), dtype=[("xcut","float"),("step","float"),("step_err","float"),
+                                           ("chi2","float"),("delta_chi2","float")])
+        scan["xcut"][order] = xcuts[order]
+        scan["step"][order], scan["step_err"][order], scan["chi2"][order] = np.concatenate(outputs).T
+        scan["delta_chi2"] = unimodal_chi2 - scan["chi2"]
+        return scan
     
     # ========================= #
     # = Step Shows            = #  
@@ -7,7 +7,7 @@ import numpy        as np
 from scipy          import stats
 import matplotlib.pyplot as mpl
 # - local dependencies
-from .utils import kwargs_update
+from .utils import kwargs_update, weighted_sum
 from .baseobjects import BaseModel,BaseFitter, DataHandler
 
 __all__ = ["normal", 'truncnormal']
@@ -170,9 +170,10 @@ class UnimodalFit( BaseFitter, DataHandler ):
         self._properties["data"] = np.asarray(data)
         self._properties["errors"] = np.asarray(errors)
         self._side_properties["names"] = np.asarray(names) if names is not None else None
+        self._reset_used_data_()
         
     def _get_model_args_(self):
-        return self.data[self.used_indexes],self.errors[self.used_indexes]
+        return self._get_used_data_("data","errors")
 
     
     def get_model(self, parameter):
@@ -282,6 +283,7 @@ class ModelNormal( BaseModel ):
     """
     """
     FREEPARAMETERS = ["mean","sigma"]
+    VECTORIZED = True
     
     sigma_boundaries = [0,None]
     
@@ -312,13 +314,37 @@ class ModelNormal( BaseModel ):
     # ----------------------- #
     # - LikeLiHood and Chi2 - #
     # ----------------------- #
-    def get_loglikelihood(self,x,dx, pdf=False):
+    def get_loglikelihood(self,x,dx, pdf=False, weights=None):
         """ Measure the likelihood to find the data given the model's parameters.
-        Set pdf to True to have the array prior sum of the logs (array not in log=pdf) """
+        Set pdf to True to have the array prior sum of the logs (array not in log=pdf).
+        weights (if any) multiply the log-likelihood of each data point """
         Li = stats.norm.pdf(x,loc=self.mean,scale=np.sqrt(self.sigma**2 + dx**2))
         if pdf:
             return Li
-        return np.sum(np.log(Li))
+        return weighted_sum(np.log(Li), weights)
+
+    def get_loglikelihood_gradient(self, x, dx, weights=None):
+        """ gradient of get_loglikelihood with respect to mean and sigma """
+        var = self.sigma**2 + dx**2
+        res = x - self.mean
+        return np.asarray([weighted_sum(res/var, weights),
+                           weighted_sum(self.sigma*(res**2/var - 1)/var, weights)])
+    
+    def initial_guess(self, x, dx, weights=None):
+        """ (weighted) mean of the data and their excess variance
+        (variance not explained by the errors) as mean and sigma guesses.
+        The sigma guess is at least 10% of the data standard deviation.
+
+        Returns
+        -------
+        dict (parametername: value)
+        """
+        x, dx = np.asarray(x, dtype="float"), np.asarray(dx, dtype="float")
+        w = np.ones(len(x)) if weights is None else np.asarray(weights, dtype="float")
+        mean = np.sum(w*x)/np.sum(w)
+        var  = np.sum(w*(x - mean)**2)/np.sum(w)
+        excess_var = var - np.sum(w*dx**2)/np.sum(w)
+        return {"mean": mean, "sigma": np.sqrt(np.maximum(excess_var, 1e-2*var))}
     
     def get_case_likelihood(self,xi,dxi,pi):
         """ return the log likelihood of the given case. See get_loglikelihood """
@@ -328,11 +354,10 @@ class ModelNormal( BaseModel ):
     # - Bayesian methods    - #
     # ----------------------- #
     def lnprior(self,parameter):
-        """ so far a flat prior """
-        for name_param,p in zip(self.FREEPARAMETERS, parameter):
-            if "sigma" in name_param and p<0:
-                return -np.inf
-        return 0
+        """ so far a flat prior (sigma must be positive).
+        parameter could be a (nwalkers, nparam) array """
+        sigmas = np.asarray(parameter)[...,["sigma" in name for name in self.FREEPARAMETERS]]
+        return np.where(np.any(sigmas<0, axis=-1), -np.inf, 0.)
 
     # ----------------------- #
     # - Ploting             - #
@@ -355,6 +380,7 @@ class ModelTruncNormal( ModelNormal ):
     """
     
     PROPERTIES = ["databounds"]
+    VECTORIZED = False
 
 
     def set_databounds(self,databounds):
@@ -387,8 +413,9 @@ class ModelTruncNormal( ModelNormal ):
     # ----------------------- #
     # - LikeLiHood and Chi2 - #
     # ----------------------- #
-    def get_loglikelihood(self,x,dx, pdf=False):
-        """ Measure the likelihood to find the data given the model's parameters """
+    def get_loglikelihood(self,x,dx, pdf=False, weights=None):
+        """ Measure the likelihood to find the data given the model's parameters
+        weights (if any) multiply the log-likelihood of each data point """
         # info about truncnorm:
         # stats.truncnorm.pdf(x,f0,f1,loc=mu,scale=sigma))
         #  => f0 and f1 are the boundaries in sigma units !
@@ -400,8 +427,28 @@ class ModelTruncNormal( ModelNormal ):
                             loc=self.mean, scale=np.sqrt(self.sigma**2 + dx**2))
         if pdf:
             return Li
-        return np.sum(np.log(Li))
-
+        return weighted_sum(np.log(Li), weights)
+
+    def get_loglikelihood_gradient(self, x, dx, weights=None):
+        """ gradient of get_loglikelihood with respect to mean and sigma """
+        grad_mean, grad_sigma = super(ModelTruncNormal, self).get_loglikelihood_gradient(x, dx,
+                                                                                        weights=weights)
+        # - derivative of the truncation normalisation: -N * dlog(cdf(tup)-cdf(tlow))
+        tlow, tup = self.get_truncboundaries(dx)
+        scalebar  = np.sqrt(self.sigma**2 + np.mean(dx)**2)
+        dnorm_mean, dnorm_sigma = 0, 0
+        if np.isfinite(tup):
+            dnorm_mean  += stats.norm.pdf(tup) / scalebar
+            dnorm_sigma -= stats.norm.pdf(tup) * tup * self.sigma / scalebar**2
+        if np.isfinite(tlow):
+            dnorm_mean  += stats.norm.pdf(tlow) / scalebar
+            dnorm_sigma += stats.norm.pdf(tlow) * tlow * self.sigma / scalebar**2
+            
+        npoints = len(x) if weights is None else np.sum(weights)
+        norm = stats.norm.cdf(tup) - stats.norm.cdf(tlow)
+        return np.asarray([grad_mean - npoints * dnorm_mean / norm,
+                           grad_sigma - npoints * dnorm_sigma / norm])
+    
     def get_truncboundaries(self,dx, mean=None, sigma=None):
         """
         """
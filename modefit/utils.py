@@ -2,6 +2,8 @@
 #! /usr/bin/env python
 # -*- coding: utf-8 -*-
 """This module gather the customed decorators of astrobject"""
+import time
+from contextlib import nullcontext
 import numpy as np
 import matplotlib.pyplot as mpl
 
@@ -213,6 +215,41 @@ def is_arraylike(a):
     """ Tests if 'a' is an array / list / tuple """
     return isinstance(a, (list, tuple, np.ndarray) )
 
+def weighted_sum(values, weights=None, axis=-1):
+    """ sum of values along the given axis. Each value (along this axis)
+    is multiplied by its weight if weights is given """
+    return np.sum(values if weights is None else values*weights, axis=axis)
+
+def get_percentiles(values, q, axis=0):
+    """ percentiles of the values along the given axis.
+    Same as np.percentile(values, q, axis=axis) (linear interpolation)
+    but based on a partial sort (np.partition) instead of a full one.
+
+    Parameters
+    ----------
+    values: [array]
+        the data
+
+    q: [float/list of floats]
+        percentile(s) to compute (between 0 and 100)
+
+    axis: [int] -optional-
+        axis along which the percentiles are computed
+
+    Returns
+    -------
+    array (shape of q + shape of values without axis)
+    """
+    values = np.moveaxis(np.asarray(values), axis, 0)
+    q      = np.asarray(q, dtype="float")
+    index  = q/100. * (len(values)-1)
+    lower  = np.floor(index).astype("int")
+    upper  = np.minimum(lower+1, len(values)-1)
+    part   = np.partition(values, np.unique(np.concatenate([np.ravel(lower), np.ravel(upper)])),
+                          axis=0)
+    frac   = np.reshape(index-lower, np.shape(q) + (1,)*(values.ndim-1))
+    return part[lower] + (part[upper]-part[lower])*frac
+
 # ========================== #
 # =  Figure Add-on         = #
 # ========================== #
@@ -364,3 +401,334 @@ def specplot(ax,x,y,var=None,
         fill = None
         
     return pl,fill
+
+# ========================== #
+# =  Parallel Tools        = #
+# ========================== #
+def get_nworkers(n_jobs, executor=None):
+    """ number of worker processes to use given `n_jobs`.
+    None or 1 means no parallelisation (returns 1) ; negative
+    values mean all the cpus but (-n_jobs-1), like in joblib.
+    If an executor is given, this returns its number of workers
+    (all the cpus if unknown) """
+    if executor is not None:
+        return getattr(executor, "_max_workers", None) or get_nworkers(-1)
+    if n_jobs is None:
+        return 1
+    n_jobs = int(n_jobs)
+    if n_jobs < 0:
+        import multiprocessing
+        n_jobs = multiprocessing.cpu_count() + 1 + n_jobs
+    return max(1, n_jobs)
+
+def parallel_map(func, arglist, n_jobs=None, executor=None):
+    """ Evaluate func(*args) for each args of arglist, potentially
+    in worker processes.
+
+    Parameters
+    ----------
+    func: [function]
+        function to evaluate. It must be picklable (i.e. defined at the
+        module level) if this is ran in worker processes.
+
+    arglist: [list of tuples]
+        arguments given to func.
+
+    n_jobs: [int/None] -optional-
+        number of worker processes. None or 1 means serial.
+        (Ignored if executor is given)
+
+    executor: [concurrent.futures.Executor] -optional-
+        Use this executor to map func.
+
+    Returns
+    -------
+    list (func outputs in the order of arglist)
+    """
+    arglist = list(arglist)
+    if len(arglist) == 0:
+        return []
+    if executor is None and get_nworkers(n_jobs) == 1:
+        return [func(*args) for args in arglist]
+    
+    if executor is not None:
+        return list(executor.map(func, *zip(*arglist)))
+    
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=get_nworkers(n_jobs)) as executor_:
+        return list(executor_.map(func, *zip(*arglist)))
+
+# ========================== #
+# =  Streaming Statistics  = #
+# ========================== #
+class P2Quantiles( object ):
+    """ P-square streaming estimate of quantiles (Jain & Chlamtac 1985):
+    5 markers per quantile are updated with the new observations, so the
+    memory does not depend on the number of observations.
+
+    The observations are processed by batches (of at most BATCHSIZE):
+    the marker positions are shifted by the number of observations below
+    them and each middle marker then moves (P-square piecewise-parabolic
+    update) by the integer closest to its desired shift. The markers of
+    all the quantiles and variables are updated at once.
+    """
+    __slots__ = ["quantiles", "nvariables", "heights", "positions",
+                 "desired", "increments", "buffer"]
+    BATCHSIZE = 32
+    
+    def __init__(self, quantiles, nvariables):
+        """
+        Parameters
+        ----------
+        quantiles: [list of floats]
+            quantiles to estimate (between 0 and 100, like for np.percentile)
+
+        nvariables: [int]
+            number of variables observed at once (e.g. the parameters)
+        """
+        self.quantiles  = np.asarray(quantiles, dtype="float")
+        self.nvariables = nvariables
+        p = np.repeat(self.quantiles/100., nvariables)[:,None]
+        self.increments = np.concatenate([np.zeros_like(p), p/2, p, (1+p)/2, np.ones_like(p)], axis=1)
+        self.desired    = np.concatenate([np.zeros_like(p), 2*p, 4*p, 2+2*p, 4*np.ones_like(p)], axis=1)
+        self.positions  = np.tile(np.arange(5, dtype="float"), (len(p),1))
+        self.heights    = None
+        self.buffer     = np.empty((0, nvariables))
+
+    def update(self, values):
+        """ add the observations (nobs, nvariables) (or a single nvariables one) """
+        values = np.atleast_2d(np.asarray(values, dtype="float"))
+        if self.heights is None:
+            self.buffer = np.concatenate([self.buffer, values])
+            if len(self.buffer) < 5:
+                return
+            self.heights = np.tile(np.sort(self.buffer[:5], axis=0).T, (len(self.quantiles),1))
+            values, self.buffer = self.buffer[5:], None
+            
+        for start in range(0, len(values), self.BATCHSIZE):
+            self._update_markers_(np.tile(values[start:start+self.BATCHSIZE], len(self.quantiles)))
+
+    def _update_markers_(self, x):
+        """ update of the markers given the new observations x (nobs, nmarkersets) """
+        q, n = self.heights, self.positions
+        # - extreme markers and positions
+        q[:,0] = np.minimum(q[:,0], x.min(axis=0))
+        q[:,4] = np.maximum(q[:,4], x.max(axis=0))
+        n[:,1:4] += np.sum(x[:,:,None] < q[None,:,1:4], axis=0)
+        n[:,4]   += len(x)
+        self.desired += len(x)*self.increments
+        # - adjust the 3 middle markers (keeping them ordered)
+        for i in range(1,4):
+            d = np.clip(np.round(self.desired[:,i] - n[:,i]),
+                        n[:,i-1]-n[:,i]+1, n[:,i+1]-n[:,i]-1)
+            move = np.abs(d) >= 1
+            if not np.any(move):
+                continue
+            d, qm, nm = d[move], q[move], n[move]
+            parabolic = qm[:,i] + d/(nm[:,i+1]-nm[:,i-1]) * \
+              ((nm[:,i]-nm[:,i-1]+d)*(qm[:,i+1]-qm[:,i])/(nm[:,i+1]-nm[:,i]) +
+               (nm[:,i+1]-nm[:,i]-d)*(qm[:,i]-qm[:,i-1])/(nm[:,i]-nm[:,i-1]))
+            rows, neighbor = np.arange(len(d)), np.where(d>0, i+1, i-1)
+            linear    = qm[:,i] + d*(qm[rows,neighbor]-qm[:,i])/(nm[rows,neighbor]-nm[:,i])
+            q[move,i] = np.where((qm[:,i-1] < parabolic) & (parabolic < qm[:,i+1]), parabolic, linear)
+            n[move,i] += d
+
+    def get_quantiles(self):
+        """ (nquantiles, nvariables) array of the current estimates """
+        if self.heights is None:
+            if len(self.buffer) == 0:
+                return np.full((len(self.quantiles), self.nvariables), np.nan)
+            return np.percentile(self.buffer, self.quantiles, axis=0)
+        return np.reshape(self.heights[:,2], (len(self.quantiles), self.nvariables))
+
+class StreamingSummary( object ):
+    """ low-memory summary of a stream of draws (nvariables each):
+    P-square quantile estimates (see P2Quantiles), running mean and
+    variance (Welford/Chan update) and a uniform random subset of the
+    draws (reservoir sampling).
+    """
+    __slots__ = ["sketch", "ndraws", "mean", "m2", "reservoir", "nreservoir", "rng"]
+
+    def __init__(self, nvariables, quantiles=[16, 50, 84], nreservoir=10000, seed=None):
+        """
+        Parameters
+        ----------
+        nvariables: [int]
+            size of each draw (e.g. number of parameters)
+
+        quantiles: [list of floats] -optional-
+            quantiles (0-100) estimated by the P-square sketch
+
+        nreservoir: [int] -optional-
+            maximum number of draws kept
+
+        seed: [int/None] -optional-
+            seed of the reservoir random selection
+        """
+        self.sketch     = P2Quantiles(quantiles, nvariables)
+        self.ndraws     = 0
+        self.mean       = np.zeros(nvariables)
+        self.m2         = np.zeros(nvariables)
+        self.nreservoir = int(nreservoir)
+        self.reservoir  = np.empty((self.nreservoir, nvariables))
+        self.rng        = np.random.default_rng(seed)
+
+    def update(self, draws):
+        """ add the given draws (ndraws, nvariables) """
+        draws = np.atleast_2d(np.asarray(draws, dtype="float"))
+        nnew  = len(draws)
+        self.sketch.update(draws)
+        # - running moments (batch Welford, Chan et al.)
+        ntot  = self.ndraws + nnew
+        mean_new = draws.mean(axis=0)
+        delta = mean_new - self.mean
+        self.m2   += np.sum((draws-mean_new)**2, axis=0) + delta**2 * self.ndraws*nnew/ntot
+        self.mean += delta * nnew/ntot
+        # - reservoir (algorithm R)
+        counts = self.ndraws + np.arange(nnew)
+        slots  = np.where(counts < self.nreservoir, counts,
+                          self.rng.integers(0, counts+1))
+        for i in np.flatnonzero(slots < self.nreservoir):
+            self.reservoir[slots[i]] = draws[i]
+        self.ndraws = ntot
+
+    def get_quantiles(self):
+        """ see P2Quantiles.get_quantiles """
+        return self.sketch.get_quantiles()
+
+    @property
+    def samples(self):
+        """ the draws kept in the reservoir (uniform random subset of all the draws) """
+        return self.reservoir[:min(self.ndraws, self.nreservoir)]
+
+    @property
+    def std(self):
+        """ standard deviation of the draws """
+        return np.sqrt(self.m2/max(self.ndraws-1, 1))
+
+
+# ======================= #
+#                         #
+#  Run Instrumentation    #
+#                         #
+# ======================= #
+class RunStats( object ):
+    """ records of what a fit or a mcmc run spent its time on:
+    number of calls of the objective functions (ncalls), wall time
+    and number of entries of each phase (timings, nphases) and the
+    wall time of each fold of a k-folding (folds).
+
+    If a callback is given, it is called as callback(name, elapsed, stats)
+    at the end of every phase and fold (name is then "fold").
+    The objective calls do not trigger the callback.
+    """
+    __slots__ = ["ncalls", "timings", "nphases", "folds", "callback"]
+
+    def __init__(self, callback=None):
+        """
+        Parameters
+        ----------
+        callback: [function/None] -optional-
+            function called as callback(name, elapsed, stats) at
+            the end of each phase and fold.
+        """
+        self.callback = callback
+        self.ncalls   = {}
+        self.reset()
+
+    def reset(self):
+        """ clean the recorded calls and timings (the callback is kept) """
+        # - the counters are set to 0 in place as counted functions refer to them
+        for name in self.ncalls:
+            self.ncalls[name] = 0
+        self.timings = {}
+        self.nphases = {}
+        self.folds   = []
+
+    # -------------- #
+    #  Recording     #
+    # -------------- #
+    def counted(self, name, func):
+        """ func wrapped such that its calls are counted in ncalls[name] """
+        ncalls = self.ncalls
+        ncalls.setdefault(name, 0)
+        def counted_func(*args, **kwargs):
+            ncalls[name] += 1
+            return func(*args, **kwargs)
+        return counted_func
+
+    def add_calls(self, name, ncalls=1):
+        """ add `ncalls` calls to ncalls[name] """
+        self.ncalls[name] = self.ncalls.get(name, 0) + ncalls
+
+    def phase(self, name):
+        """ context manager timing the enclosed code as the `name` phase:
+        >>> with stats.phase("minimize"):
+        ...     do_it()
+        """
+        return _RunPhase(self, name)
+
+    def add_timing(self, name, elapsed):
+        """ record a `name` phase that lasted `elapsed` seconds """
+        self.timings[name] = self.timings.get(name, 0) + elapsed
+        self.nphases[name] = self.nphases.get(name, 0) + 1
+        if self.callback is not None:
+            self.callback(name, elapsed, self)
+
+    def add_fold(self, elapsed):
+        """ record the wall time of a fold """
+        self.folds.append(elapsed)
+        if self.callback is not None:
+            self.callback("fold", elapsed, self)
+
+    def merge(self, stats):
+        """ add the records of the given RunStats
+        (e.g. those of worker processes) to this one. The callback is not called. """
+        for name, n in stats.ncalls.items():
+            self.ncalls[name] = self.ncalls.get(name, 0) + n
+        for name, elapsed in stats.timings.items():
+            self.timings[name] = self.timings.get(name, 0) + elapsed
+            self.nphases[name] = self.nphases.get(name, 0) + stats.nphases[name]
+        self.folds.extend(stats.folds)
+
+    # -------------- #
+    #  Output        #
+    # -------------- #
+    def get_summary(self):
+        """ dictionary of the records:
+        ncalls, timings, nphases, folds (array) and total_time (sum of the timings) """
+        return {"ncalls": dict(self.ncalls), "timings": dict(self.timings),
+                "nphases": dict(self.nphases),
+                "folds": np.asarray(self.folds, dtype="float"),
+                "total_time": np.sum(list(self.timings.values()))}
+
+    def __repr__(self):
+        """ """
+        lines = ["%s: %d calls"%(name, n) for name, n in self.ncalls.items()]
+        lines += ["%s: %.4g s (%d)"%(name, elapsed, self.nphases[name])
+                  for name, elapsed in self.timings.items()]
+        if len(self.folds) > 0:
+            lines.append("folds: %d, %.4g s mean"%(len(self.folds), np.mean(self.folds)))
+        return "RunStats(%s)"%(", ".join(lines))
+
+def run_phase(stats, name):
+    """ stats.phase(name) or a context manager doing nothing if stats is None
+    (the instrumentation is then nearly free) """
+    return _NO_PHASE if stats is None else stats.phase(name)
+
+_NO_PHASE = nullcontext()
+
+class _RunPhase( object ):
+    """ context manager of RunStats.phase """
+    __slots__ = ["stats", "name", "start"]
+
+    def __init__(self, stats, name):
+        self.stats, self.name = stats, name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.add_timing(self.name, time.perf_counter() - self.start)
+        return False